@@ -1,17 +1,24 @@
 import importlib
 import json
 import os
+from contextlib import nullcontext
 
 import sentry_sdk
 from sentry_sdk.integrations.aws_lambda import AwsLambdaIntegration
 
+from ddj_cloud.utils.tracing import DEFAULT_TRACES_SAMPLE_RATE
+
 sentry_sdk.init(
     os.environ.get("SENTRY_DSN"),
-    traces_sample_rate=1.0,
+    # Configured per scraper in scrapers_config.json, tracing every run of
+    # high-frequency scrapers quickly exceeds the Sentry quota
+    traces_sample_rate=float(
+        os.environ.get("SENTRY_TRACES_SAMPLE_RATE", DEFAULT_TRACES_SAMPLE_RATE),
+    ),
     integrations=[AwsLambdaIntegration()],
 )
 
-from ddj_cloud.utils import storage  # noqa: E402
+from ddj_cloud.utils import freshness, profiling, sharding, storage  # noqa: E402
 from ddj_cloud.utils.date_and_time import local_now  # noqa: E402
 
 
@@ -23,10 +30,43 @@ def scrape(event, context):  # noqa: ARG001
         try:
             scraper = importlib.import_module(f"ddj_cloud.scrapers.{module_name}.{module_name}")
 
-            if getattr(scraper, "run", None):
-                scraper.run()
-            else:
-                print("No run function found")
+            shards = (
+                sharding.shards_from_event(scraper, event) if sharding.is_sharded(scraper) else None
+            )
+
+            run_context = (
+                profiling.profile(module_name) if profiling.is_requested(event) else nullcontext()
+            )
+
+            probe = (
+                freshness.probe(module_name, scraper, shards)
+                if freshness.has_probe(scraper)
+                else None
+            )
+
+            if probe is not None and not probe.changed and not event.get("force", False):
+                print(f"Upstream data of {module_name} unchanged, skipping run")
+                return _response(module_name)
+
+            # Failed shards must run again, even if the upstream data is unchanged
+            succeeded = True
+
+            with run_context:
+                if shards is not None:
+                    scope.set_tag("shards", ",".join(shards))
+                    succeeded = sharding.run_sharded(
+                        module_name,
+                        scraper,
+                        shards,
+                        merge=event.get("merge", True),
+                    )
+                elif getattr(scraper, "run", None):
+                    scraper.run()
+                else:
+                    print("No run function found")
+
+            if probe is not None and succeeded:
+                probe.save()
 
             now = local_now()
             print(f"Ran {module_name} at {now}")
@@ -49,6 +89,10 @@ def scrape(event, context):  # noqa: ARG001
         for storage_event_description in storage.describe_events(clear=False):
             print("-", storage_event_description)
 
+    return _response(module_name)
+
+
+def _response(module_name: str) -> dict:
     body = {
         "message": f"Ran scraper {module_name} successfully.",
         "storage_events": storage.STORAGE_EVENTS,
@@ -2,8 +2,7 @@ import gzip
 import os
 from datetime import UTC, datetime
 
-import requests
-
+from ddj_cloud.utils import http
 from ddj_cloud.utils.storage import upload_file
 
 URL = (
@@ -34,7 +33,7 @@ def run():
         "DB-Api-Key": api_key,
     }
 
-    resp = requests.get(URL, headers=headers, timeout=60)
+    resp = http.get(URL, headers=headers, timeout=60)
     resp.raise_for_status()  # wirft Exception bei HTTP-Fehlern
 
     timestamp = datetime.now(UTC).strftime("%Y-%m-%dT%H-%M-%SZ")
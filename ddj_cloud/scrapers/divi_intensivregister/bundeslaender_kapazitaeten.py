@@ -1,9 +1,11 @@
+import pandas as pd
+
 from ddj_cloud.scrapers.divi_intensivregister.common import (
     add_rows_for_missing_dates,
     filter_by_bundesland,
     filter_by_latest_date,
-    load_data,
     make_latest_date_single,
+    run_if_changed,
 )
 from ddj_cloud.utils.storage import upload_dataframe
 
@@ -17,8 +19,8 @@ meta_columns = [
 ]
 
 
-def run():
-    df = load_data(url)
+@run_if_changed(url)
+def run(df: pd.DataFrame):
     upload_dataframe(df, "divi_intensivregister/bundeslaender_kapazitaeten/history.csv")
 
     df_latest_date = filter_by_latest_date(df)
@@ -1,31 +1,35 @@
-from collections.abc import Generator
+from collections.abc import Callable, Generator
+from functools import wraps
 from io import StringIO
-from pathlib import Path
 
 import pandas as pd
-import requests
 
+from ddj_cloud.utils import http_cache
 
-def load_data(url: str) -> pd.DataFrame:
-    cached_file = Path(__file__).parent / "cache" / url.rsplit("/", maxsplit=1)[-1]
 
-    if cached_file.exists():
-        print("Using cached file:", cached_file)
-        return pd.read_csv(cached_file, low_memory=False)
+def run_if_changed(url: str) -> Callable[[Callable[[pd.DataFrame], None]], Callable[[], None]]:
+    """Decorate a sub-scraper's ``run`` that processes the CSV at ``url``.
 
-    print("Downloading data:", url)
-    r = requests.get(url)
-    r.raise_for_status()
+    The CSV is requested conditionally and only processed if it changed since the last
+    successful run. If processing fails, the next run processes it again.
+    """
 
-    try:
-        cached_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(cached_file, "w") as f:
-            f.write(r.text)
-    except Exception:
-        # Can't write here on Lambda
-        pass
+    def decorator(process: Callable[[pd.DataFrame], None]) -> Callable[[], None]:
+        @wraps(process)
+        def run() -> None:
+            print("Downloading data:", url)
+            response = http_cache.get(url, save=False)
 
-    return pd.read_csv(StringIO(r.text), low_memory=False)
+            if not response.changed:
+                print("Data unchanged, skipping:", url)
+                return
+
+            process(pd.read_csv(StringIO(response.text), low_memory=False))
+            response.save()
+
+        return run
+
+    return decorator
 
 
 def filter_by_latest_date(df: pd.DataFrame) -> pd.DataFrame:
@@ -6,8 +6,8 @@ import pandas as pd
 from ddj_cloud.scrapers.divi_intensivregister.common import (
     add_rows_for_missing_dates,
     filter_by_latest_date,
-    load_data,
     make_latest_date_single,
+    run_if_changed,
 )
 from ddj_cloud.utils.storage import upload_dataframe
 
@@ -64,8 +64,8 @@ def expand_df(
     )
 
 
-def run():
-    df = load_data(url)
+@run_if_changed(url)
+def run(df: pd.DataFrame):
     df = add_rows_for_missing_dates(
         df,
         [*meta_columns, "behandlungsgruppe", "behandlungsgruppe_level_2"],
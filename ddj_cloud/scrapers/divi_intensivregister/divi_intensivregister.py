@@ -8,18 +8,56 @@ from ddj_cloud.scrapers.divi_intensivregister import (
     deutschland_kapazitaeten,
     landkreise_kapazitaeten,
 )
+from ddj_cloud.utils import http_cache
+from ddj_cloud.utils.tracing import OP_TASK, span
 
-
-def run():
+SCRAPERS = {
+    scraper.__name__.rsplit(".", maxsplit=1)[-1]: scraper
     for scraper in [
         deutschland_altersgruppen,
         deutschland_kapazitaeten,
         bundeslaender_kapazitaeten,
         landkreise_kapazitaeten,
-    ]:
+    ]
+}
+
+
+# Skip the run if none of the CSVs changed
+def probe() -> str | None:
+    fingerprints = [http_cache.fingerprint(scraper.url) for scraper in SCRAPERS.values()]
+    if None in fingerprints:
+        return None
+    return ",".join(fingerprints)  # type: ignore[arg-type]
+
+
+# Each sub-scraper is a shard of its own. They upload their own results,
+# so there is nothing to merge
+def shards() -> list[str]:
+    return list(SCRAPERS)
+
+
+def run_shard(shard: str) -> None:
+    with span(OP_TASK, shard):
+        SCRAPERS[shard].run()
+
+
+def merge(results: dict[str, None]):  # noqa: ARG001
+    pass
+
+
+def run():
+    failed = []
+    for name, scraper in SCRAPERS.items():
         try:
-            scraper.run()
+            with span(OP_TASK, name):
+                scraper.run()
         except Exception as e:
             sentry_sdk.capture_exception(e)
             print("Error in scraper", scraper.__name__)
             print_exc()
+            failed.append(name)
+
+    # Fail the run, so the probe fingerprint isn't stored and the next run retries
+    if failed:
+        msg = f"Failed DIVI scrapers: {', '.join(failed)}"
+        raise RuntimeError(msg)
@@ -4,8 +4,8 @@ from ddj_cloud.scrapers.divi_intensivregister.common import (
     add_rows_for_missing_dates,
     filter_by_landkreis,
     filter_by_latest_date,
-    load_data,
     make_latest_date_single,
+    run_if_changed,
 )
 from ddj_cloud.utils.storage import upload_dataframe
 
@@ -34,8 +34,8 @@ def add_columns(df: pd.DataFrame):
     )
 
 
-def run():
-    df = load_data(url)
+@run_if_changed(url)
+def run(df: pd.DataFrame):
     add_columns(df)
 
     upload_dataframe(df, "divi_intensivregister/landkreise_kapazitaeten/history.csv", archive=False)
@@ -7,24 +7,23 @@ Uses a static station list with pre-computed WGS84 coordinates (converted
 from UTM32N using convert_eglv_coords.py).
 """
 
-import json
 import logging
-import time
 from datetime import datetime
-from pathlib import Path
 
-import requests
 from pydantic import BaseModel, ConfigDict, model_validator
 
 from ddj_cloud.scrapers.lanuk_karte.common import WARNSTUFE_COLORS, StationRow
+from ddj_cloud.utils import http
 from ddj_cloud.utils.date_and_time import BERLIN, local_now
+from ddj_cloud.utils.fetch import fetch_all
+from ddj_cloud.utils.rate_limit import RateLimit
+from ddj_cloud.utils.tracing import OP_FETCH, traced
 
 logger = logging.getLogger(__name__)
 
 MEASUREMENTS_URL = "https://pegel.eglv.de/measurements/"
-REQUEST_DELAY = 0.5  # seconds between per-station requests
-
-CACHE_DIR = Path(__file__).parent / "cache"
+RATE_LIMIT = RateLimit(per_second=2, burst=2)  # per-station requests
+MAX_CONCURRENT_REQUESTS = 2
 
 # Static station list with pre-computed WGS84 coordinates.
 # Source: pegelstaende-pipeline-nrw/tasks/shared-code/src/shared/stationen.py
@@ -228,42 +227,40 @@ class EGLVResponse(BaseModel):
 # -- Fetcher --
 
 
-def _fetch_station(session: requests.Session, station_id: str) -> EGLVResponse:
-    """Fetch and validate the EGLV API response for one station.
-
-    Automatically sleeps after non-cached requests to respect rate limits.
-    """
-    cache_filename = f"eglv_{station_id}.json"
-    cached = CACHE_DIR / cache_filename
-
-    if cached.exists():
-        logger.debug("Using cached %s", cache_filename)
-        raw = json.loads(cached.read_text())
-    else:
-        response = session.get(
-            MEASUREMENTS_URL,
-            params={"serial": station_id, "unit_name": "Wasserstand"},
-            timeout=30,
-            verify=False,
-        )
-        response.raise_for_status()
-        raw = response.json()
+@traced(OP_FETCH)
+def _fetch_station(station_id: str) -> EGLVResponse:
+    """Fetch and validate the EGLV API response for one station."""
+    response = http.get(
+        MEASUREMENTS_URL,
+        params={"serial": station_id, "unit_name": "Wasserstand"},
+        timeout=30,
+        verify=False,
+    )
+    response.raise_for_status()
+    return EGLVResponse.model_validate(response.json())
 
-        try:
-            CACHE_DIR.mkdir(parents=True, exist_ok=True)
-            cached.write_text(json.dumps(raw))
-        except Exception:
-            pass  # read-only on Lambda
 
-        time.sleep(REQUEST_DELAY)
-
-    return EGLVResponse.model_validate(raw)
-
-
-def run(session: requests.Session) -> list[StationRow]:
+def run() -> list[StationRow]:
     now = local_now()
     rows: list[StationRow] = []
 
+    # All stations come from the same API, so they share its limits
+    selected_ids = [
+        station_id
+        for station_id, *_ in _STATIONS
+        if station_id in (SELECTED_STATIONS | SELECTED_STATIONS_NO_STATS)
+    ]
+    results = {
+        result.item: result
+        for result in fetch_all(
+            selected_ids,
+            _fetch_station,
+            host=MEASUREMENTS_URL,
+            max_per_host=MAX_CONCURRENT_REQUESTS,
+            rate_limit=RATE_LIMIT,
+        )
+    }
+
     for station_id, pegelname, gewaesser, lat, lon in _STATIONS:
         if station_id not in (SELECTED_STATIONS | SELECTED_STATIONS_NO_STATS):
             logger.info(
@@ -274,7 +271,7 @@ def run(session: requests.Session) -> list[StationRow]:
             continue
 
         try:
-            station_data = _fetch_station(session, station_id)
+            station_data = results[station_id].unwrap()
         except Exception:
             logger.exception("Failed to fetch EGLV water level for %s (%s)", pegelname, station_id)
             continue
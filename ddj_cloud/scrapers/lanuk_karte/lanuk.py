@@ -5,18 +5,18 @@ Fetches current water level data from all LANUK stations in NRW.
 Ported from pegelstaende-pipeline-nrw (simplified: no BigQuery, no intermediate stages).
 """
 
-import json
 import logging
-import time
 from datetime import datetime
-from pathlib import Path
 from typing import Any
 
-import requests
 from pydantic import BaseModel, ValidationError, field_validator
 
 from ddj_cloud.scrapers.lanuk_karte.common import WARNSTUFE_COLORS, StationRow
+from ddj_cloud.utils import disk_cache, http, http_cache
 from ddj_cloud.utils.date_and_time import BERLIN, local_now
+from ddj_cloud.utils.fetch import FetchResult, fetch_all
+from ddj_cloud.utils.rate_limit import RateLimit
+from ddj_cloud.utils.tracing import OP_FETCH, traced
 
 logger = logging.getLogger(__name__)
 
@@ -28,9 +28,11 @@ VALID_STATION_TYPES = {
     "Weiter Betreiber Infostufen",
     "Weiterer Betreiber Normal",
 }
-REQUEST_DELAY = 0.5  # seconds between per-station requests
+RATE_LIMIT = RateLimit(per_second=2, burst=4)  # per-station requests
+MAX_CONCURRENT_REQUESTS = 4
 
-CACHE_DIR = Path(__file__).parent / "cache"
+# The operator of a station (from its index.json) hardly ever changes
+OPERATOR_CACHE_TTL = 24 * 60 * 60
 
 
 KNOWN_BAD_STATIONS = {
@@ -98,40 +100,21 @@ class Station(BaseModel):
         return v
 
 
-# -- Caching (pattern from divi_intensivregister/common.py) --
-
-
-def _fetch_json(session: requests.Session, url: str, cache_filename: str) -> Any:
-    """Fetch JSON from *url*, using a local file cache when available.
+# -- Fetchers --
 
-    Automatically sleeps after non-cached requests to respect rate limits.
-    """
-    cached = CACHE_DIR / cache_filename
-    if cached.exists():
-        logger.debug("Using cached %s", cache_filename)
-        return json.loads(cached.read_text())
 
-    response = session.get(url, timeout=30)
+@traced(OP_FETCH)
+def _fetch_json(url: str) -> Any:
+    """Fetch JSON from *url*."""
+    response = http.get(url, timeout=30)
     response.raise_for_status()
-    data = response.json()
-
-    try:
-        CACHE_DIR.mkdir(parents=True, exist_ok=True)
-        cached.write_text(json.dumps(data))
-    except Exception:
-        pass  # read-only on Lambda
-
-    time.sleep(REQUEST_DELAY)
-    return data
-
-
-# -- Fetchers --
+    return response.json()
 
 
-def _fetch_stations(session: requests.Session) -> list[Station]:
+def _fetch_stations() -> list[Station]:
     """Fetch the station list, validate each entry, skip invalid ones."""
     raw_entries: list[dict[str, Any]]
-    raw_entries = _fetch_json(session, STATIONS_URL, "stations.json")
+    raw_entries = http_cache.get(STATIONS_URL, timeout=30).json()
 
     stations: list[Station] = []
     for entry in raw_entries:
@@ -151,18 +134,50 @@ def _fetch_stations(session: requests.Session) -> list[Station]:
     return stations
 
 
-def _fetch_current_level(
-    session: requests.Session, site_no: str, station_no: str
-) -> tuple[float, datetime]:
-    """Fetch the most recent water level measurement from the week endpoint.
+def _week_url(station: Station) -> str:
+    return f"{BASE_URL}{station.site_no}/{station.station_no}/S/week.json"
 
-    Returns (value_cm, timestamp).
+
+def _index_url(station: Station) -> str:
+    return f"{BASE_URL}{station.site_no}/{station.station_no}/index.json"
+
+
+def _fetch_station_data(stations: list[Station]) -> dict[str, FetchResult[str, Any]]:
+    """Fetch the week and index data of all stations concurrently, keyed by URL.
+
+    Index data is reused from the disk cache of warm containers.
     """
-    url = f"{BASE_URL}{site_no}/{station_no}/S/week.json"
-    cache_filename = f"week_{site_no}_{station_no}.json"
-    payload: list[dict[str, Any]]
-    payload = _fetch_json(session, url, cache_filename)
+    results: dict[str, FetchResult[str, Any]] = {}
+    urls: list[str] = []
 
+    for station in stations:
+        urls.append(_week_url(station))
+
+        index_url = _index_url(station)
+        payload = disk_cache.load(index_url, ttl=OPERATOR_CACHE_TTL)
+        if payload is None:
+            urls.append(index_url)
+        else:
+            results[index_url] = FetchResult(index_url, value=payload)
+
+    for result in fetch_all(
+        urls,
+        _fetch_json,
+        max_per_host=MAX_CONCURRENT_REQUESTS,
+        rate_limit=RATE_LIMIT,
+    ):
+        if result.item.endswith("/index.json") and result.error is None:
+            disk_cache.store(result.item, result.value)
+        results[result.item] = result
+
+    return results
+
+
+def _parse_current_level(payload: list[dict[str, Any]]) -> tuple[float, datetime]:
+    """Get the most recent water level measurement from the week endpoint payload.
+
+    Returns (value_cm, timestamp).
+    """
     if not payload:
         msg = "No payload"
         raise RuntimeError(msg)
@@ -179,11 +194,8 @@ def _fetch_current_level(
     raise RuntimeError(msg)
 
 
-def _fetch_operator(session: requests.Session, site_no: str, station_no: str) -> str:
-    """Fetch the LANUV_Betr (operator) field from the station index endpoint."""
-    url = f"{BASE_URL}{site_no}/{station_no}/index.json"
-    cache_filename = f"index_{site_no}_{station_no}.json"
-    data = _fetch_json(session, url, cache_filename)
+def _parse_operator(data: dict[str, Any]) -> str:
+    """Get the LANUV_Betr (operator) field from the station index endpoint payload."""
     return data.get("LANUV_Betr", "").strip()
 
 
@@ -210,18 +222,33 @@ def _build_pegel_url(station_id: str, station_name: str) -> str:
     )
 
 
-def run(session: requests.Session) -> list[StationRow]:  # noqa: PLR0912
+def run(  # noqa: PLR0912
+    *,
+    shard_index: int = 0,
+    shard_count: int = 1,
+) -> list[StationRow]:
+    """Build rows for all LANUK stations, or only every ``shard_count``-th station
+    starting at ``shard_index`` (ordered by station ID) when sharded."""
     now = local_now()
 
     logger.info("Fetching LANUK station list...")
-    stations = _fetch_stations(session)
+    stations = _fetch_stations()
     logger.info("Found %d valid LANUK stations", len(stations))
 
+    if shard_count > 1:
+        stations = sorted(stations, key=lambda station: station.station_id)
+        stations = stations[shard_index::shard_count]
+        logger.info(
+            "Processing %d stations in shard %d/%d", len(stations), shard_index, shard_count
+        )
+
+    results = _fetch_station_data(stations)
+
     rows: list[StationRow] = []
 
     for station in stations:
         try:
-            value, timestamp = _fetch_current_level(session, station.site_no, station.station_no)
+            value, timestamp = _parse_current_level(results[_week_url(station)].unwrap())
             timestamp = timestamp.astimezone(BERLIN)  # Normalize to Berlin time
         except Exception:
             if station.station_id in KNOWN_BAD_STATIONS:
@@ -235,9 +262,7 @@ def run(session: requests.Session) -> list[StationRow]:  # noqa: PLR0912
             continue
 
         try:
-            operator = _normalize_operator(
-                _fetch_operator(session, station.site_no, station.station_no)
-            )
+            operator = _normalize_operator(_parse_operator(results[_index_url(station)].unwrap()))
         except Exception:
             logger.exception(
                 "Failed to fetch operator for %s (%s)",
@@ -2,16 +2,23 @@
 
 Fetches current water level data from LANUK and EGLV stations and uploads
 a combined CSV suitable for a Datawrapper map.
+
+The LANUK stations are split into ``LANUK_SHARD_COUNT`` shards and EGLV is a shard of
+its own, so the work can be spread over several invocations (see ``ddj_cloud.utils.sharding``).
 """
 
 import dataclasses
+import datetime as dt
 import logging
 
 import pandas as pd
-import requests
 
 from ddj_cloud.scrapers.lanuk_karte import eglv, lanuk
-from ddj_cloud.scrapers.lanuk_karte.common import STATION_TYPE_DISPLAY, clean_station_name
+from ddj_cloud.scrapers.lanuk_karte.common import (
+    STATION_TYPE_DISPLAY,
+    StationRow,
+    clean_station_name,
+)
 from ddj_cloud.scrapers.lanuk_karte.geo_filter import is_in_nrw
 from ddj_cloud.utils.storage import upload_dataframe
 
@@ -23,11 +30,29 @@ OPERATOR_SPECIAL_CASES = {
 }
 
 
-def run():
-    session = requests.Session()
+LANUK_SHARD_COUNT = 4
+
+# Don't put stations on the map whose shard hasn't succeeded for a while
+SHARD_RESULT_MAX_AGE = dt.timedelta(hours=3)
+
+
+def shards() -> list[str]:
+    return [*(f"lanuk_{i}" for i in range(LANUK_SHARD_COUNT)), "eglv"]
+
+
+def run_shard(shard: str) -> list[StationRow]:
+    if shard == "eglv":
+        return eglv.run()
 
-    lanuk_rows = lanuk.run(session)
-    eglv_rows = eglv.run(session)
+    shard_index = int(shard.removeprefix("lanuk_"))
+    return lanuk.run(shard_index=shard_index, shard_count=LANUK_SHARD_COUNT)
+
+
+def merge(results: dict[str, list[StationRow]]):
+    lanuk_rows = [
+        row for shard, rows in results.items() if shard.startswith("lanuk") for row in rows
+    ]
+    eglv_rows = results.get("eglv", [])
     all_rows = lanuk_rows + eglv_rows
 
     for row in all_rows:
@@ -73,3 +98,12 @@ def run():
     # if os.environ.get("LANUK_KARTE_DATAWRAPPER_TOKEN"):
     #     rows_locator = [row for row in lanuk_rows if any((row.info_1, row.info_2, row.info_3))]
     #     locator_map.run(rows_locator)
+
+
+def run():
+    merge(
+        {
+            "lanuk": lanuk.run(),
+            "eglv": eglv.run(),
+        }
+    )
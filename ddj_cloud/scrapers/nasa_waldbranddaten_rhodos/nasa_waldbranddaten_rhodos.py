@@ -7,8 +7,8 @@ from zoneinfo import ZoneInfo
 
 import dateparser
 import pandas as pd
-import requests as r
 
+from ddj_cloud.utils import http_cache
 from ddj_cloud.utils.datawrapper_patched import Datawrapper
 from ddj_cloud.utils.storage import upload_dataframe
 
@@ -25,10 +25,14 @@ TZ_BERLIN = ZoneInfo("Europe/Berlin")
 TZ_UTC = ZoneInfo("UTC")
 
 
+def probe() -> str | None:
+    # The CSV is regenerated a few times per hour, the chart only needs updating then
+    return http_cache.fingerprint(URL)
+
+
 def run():
     # Get the data for the last 24 hours
-    resp_nasa_csv = r.get(URL)
-    resp_nasa_csv.raise_for_status()
+    resp_nasa_csv = http_cache.get(URL)
 
     df = pd.read_csv(
         StringIO(resp_nasa_csv.text),
@@ -1,11 +1,13 @@
 import datetime as dt
 import json
 import os
+from io import StringIO
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
 import pandas as pd
 
+from ddj_cloud.utils import http
 from ddj_cloud.utils.datawrapper_patched import Datawrapper
 from ddj_cloud.utils.storage import upload_dataframe
 
@@ -38,17 +40,23 @@ def make_nasa_data_url(date: dt.date | str):
     return url
 
 
+def _read_csv(url: str) -> pd.DataFrame:
+    response = http.get(url)
+    response.raise_for_status()
+    return pd.read_csv(StringIO(response.text), sep=",", decimal=".", low_memory=False)
+
+
 def run():
     # Check data availability
     url = f"{NASA_API_BASE_URL}/data_availability/csv/{MAP_KEY}/{INSTRUMENT}"
-    df_avail = pd.read_csv(url, sep=",", decimal=".", low_memory=False)
+    df_avail = _read_csv(url)
     print(df_avail)
     latest_data_day: str = df_avail.loc[df_avail["data_id"] == INSTRUMENT, "max_date"].values[0]
     print("Latest data day:", latest_data_day)
 
     # Get the data for the latest day
     url = make_nasa_data_url(latest_data_day)
-    df = pd.read_csv(url, sep=",", decimal=".", low_memory=False)
+    df = _read_csv(url)
 
     print(f"Got data for {latest_data_day}!")
 
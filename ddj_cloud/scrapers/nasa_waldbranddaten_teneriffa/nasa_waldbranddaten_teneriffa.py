@@ -1,12 +1,14 @@
 import datetime as dt
 import json
 import os
+from io import StringIO
 from pathlib import Path
 from uuid import uuid4
 from zoneinfo import ZoneInfo
 
 import pandas as pd
 
+from ddj_cloud.utils import http
 from ddj_cloud.utils.datawrapper_patched import Datawrapper
 from ddj_cloud.utils.storage import upload_dataframe
 
@@ -42,8 +44,10 @@ def make_nasa_data_url():
 def run():
     # Get the data for the latest day
     url = make_nasa_data_url()
+    response = http.get(url)
+    response.raise_for_status()
     df = pd.read_csv(
-        url,
+        StringIO(response.text),
         sep=",",
         decimal=".",
         low_memory=False,
@@ -2,8 +2,9 @@ from collections.abc import Iterable
 from typing import cast
 
 import pandas as pd
-import requests
 
+from ddj_cloud.utils import http
+from ddj_cloud.utils.fetch import fetch_all
 from ddj_cloud.utils.storage import upload_dataframe
 
 from .models import Filters, Results
@@ -12,7 +13,7 @@ BASE_URL = "https://infoportal.mobil.nrw"
 
 
 def _load_filters():
-    response = requests.get(f"{BASE_URL}/QmFilterShow.html")
+    response = http.get(f"{BASE_URL}/QmFilterShow.html")
     response.raise_for_status()
 
     response_json = response.json()
@@ -38,7 +39,7 @@ def _load_year(targets: list[Filters.Target], year: int):
         )
     )
 
-    response = requests.post(url, data=post_data)
+    response = http.post(url, data=post_data)
     response.raise_for_status()
 
     response_json = response.json()
@@ -91,9 +92,19 @@ def run():
 
     assert len(years_available) > 0, "No years available"
 
+    # Load all years concurrently, but keep the rows in year order
+    results = {
+        result.item: result.unwrap()
+        for result in fetch_all(
+            years_available,
+            lambda year: list(_load_year(targets_without_year, year)),
+            host=BASE_URL,
+        )
+    }
+
     rows: list[dict] = []
     for year in years_available:
-        for result in _load_year(targets_without_year, year):
+        for result in results[year]:
             rows.extend(_to_quarter_rows(result, year))
 
     df = pd.DataFrame(rows)
@@ -22,6 +22,45 @@ TABLE_ROHOEL = "boerse_ard_rohoel_zeitreihe_int"
 
 LABELS = {"cost_category": "wdr", "triggered_by": "wdr-ddj-cloud"}
 
+SERVICE_ACCOUNT_ENV_VAR = "SWR_BENZINPREISE_SERVICE_ACCOUNT"
+
+
+def make_client() -> bigquery.Client | None:
+    if SERVICE_ACCOUNT_ENV_VAR not in os.environ:
+        return None
+
+    service_account_info = json.loads(os.environ[SERVICE_ACCOUNT_ENV_VAR])
+    return bigquery_utils.make_client(service_account_info, location="europe-west3")
+
+
+def probe() -> str | None:
+    """Latest timestamps of all source tables, plus the date for the rolling 30-day window."""
+    client = make_client()
+    if client is None:
+        return None
+
+    query = """
+        SELECT
+            (SELECT MAX(abrufdatum) FROM `@tageswerte` WHERE ags = @ags),
+            (SELECT MAX(datenstand) FROM `@aufloesung` WHERE ags = @ags),
+            (SELECT MAX(datenstand) FROM `@dataset_boerse.@rohoel`)
+    """
+    query = bigquery_utils.insert_table_name(query, TABLE_TAGESWERTE, "@tageswerte")
+    query = bigquery_utils.insert_table_name(query, TABLE_AUFLOESUNG, "@aufloesung")
+    query = bigquery_utils.insert_table_name(query, TABLE_ROHOEL, "@rohoel")
+    query = query.replace("@dataset_boerse", DATASET_BOERSE.dataset_id)
+
+    job_config = bigquery.QueryJobConfig(
+        default_dataset=DATASET_BUNDESKARTELLAMT,
+        query_parameters=[
+            bigquery.ScalarQueryParameter("ags", "STRING", "05"),
+        ],
+        labels=LABELS,
+    )
+    (row,) = client.query(query, job_config=job_config).result()
+
+    return "|".join([local_today().isoformat(), *(str(value) for value in row.values())])
+
 
 def load_tageswerte(client: bigquery.Client):
     query = "SELECT * FROM `@table_name` WHERE ags = @ags ORDER BY meldedatum DESC, type ASC"
@@ -204,12 +243,9 @@ def expand_column(
 
 def run():
     # Set up Google BigQuery access
-    SERVICE_ACCOUNT_ENV_VAR = "SWR_BENZINPREISE_SERVICE_ACCOUNT"
+    bigquery_client = make_client()
 
-    if SERVICE_ACCOUNT_ENV_VAR in os.environ:
-        service_account_info = json.loads(os.environ[SERVICE_ACCOUNT_ENV_VAR])
-        bigquery_client = bigquery_utils.make_client(service_account_info, location="europe-west3")
-    else:
+    if bigquery_client is None:
         print("Service account not found in environment, BigQuery client could not be created")
         print(f"Please set the environment variable {SERVICE_ACCOUNT_ENV_VAR}")
         return
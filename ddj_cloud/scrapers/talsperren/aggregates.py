@@ -0,0 +1,157 @@
+"""Aggregates of the base dataset, shared between the exporters of a run.
+
+Several exporters resample the same data per reservoir, e.g. all of the map exporters.
+``AggregateCache`` computes each aggregate only once per run, keyed by frequency, columns
+and filter, and is safe to use from concurrently running exporters.
+
+Exporters declare the aggregates they use as ``Resampled`` inputs, so they can be computed
+ahead of the exporters that need them.
+"""
+
+import datetime as dt
+import threading
+from collections.abc import Callable, Hashable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+from ddj_cloud.utils.date_and_time import local_today_midnight
+
+from .common import reservoir_ids
+
+
+@dataclass(frozen=True)
+class Resampled:
+    """Declaration of a resampled aggregate, see ``AggregateCache.resampled``.
+
+    ``lookback`` limits the measurements to those after today's midnight minus the given
+    time. ``closed`` and ``label`` are passed on to ``resample`` if set.
+    """
+
+    rule: str
+    columns: tuple[str, ...]
+    ignored_reservoirs: tuple[str, ...] = ()
+    lookback: relativedelta | None = None
+    closed: str | None = None
+    label: str | None = None
+
+
+class AggregateCache:
+    def __init__(self, df_base: pd.DataFrame):
+        self._df_base = df_base
+        self._values: dict[Hashable, Any] = {}
+        self._locks: dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def memoized[T](self, key: Hashable, factory: Callable[[], T]) -> T:
+        """Get the value for ``key``, computing it with ``factory`` on first use.
+
+        Concurrent callers of the same key wait for the first one instead of computing it
+        again. If ``factory`` raises, nothing is cached and the next caller tries again.
+        """
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+
+        with lock:
+            if key not in self._values:
+                self._values[key] = factory()
+            return self._values[key]
+
+    def get(self, spec: Resampled) -> pd.DataFrame:
+        """Get the resampled aggregate declared by ``spec``."""
+        since = None
+        if spec.lookback is not None:
+            since = local_today_midnight() - spec.lookback
+
+        resample_kwargs = {"closed": spec.closed, "label": spec.label}
+        return self.resampled(
+            spec.rule,
+            spec.columns,
+            ignored_reservoirs=spec.ignored_reservoirs,
+            since=since,
+            **{key: value for key, value in resample_kwargs.items() if value is not None},
+        )
+
+    def resampled(
+        self,
+        rule: str,
+        columns: Sequence[str],
+        *,
+        ignored_reservoirs: Sequence[str] | None = None,
+        since: dt.datetime | None = None,
+        **resample_kwargs: Any,
+    ) -> pd.DataFrame:
+        """Median of ``columns`` per reservoir, resampled to ``rule`` in Berlin time.
+
+        The result has a row for every reservoir and timestamp, indexed by ``id``
+        (``<federation_name>_<name>``) and ``ts_measured``. Missing values are forward
+        filled from the same reservoir. Every call returns a copy, so it may be modified.
+
+        Args:
+            rule (str): Resampling frequency, e.g. ``"D"``.
+            columns (Sequence[str]): Columns to aggregate.
+            ignored_reservoirs (Sequence[str], optional): Names of reservoirs to leave out.
+            since (dt.datetime, optional): Only use measurements after this time.
+            **resample_kwargs: Passed on to ``resample``, e.g. ``closed`` and ``label``.
+        """
+        key = (
+            "resampled",
+            rule,
+            tuple(columns),
+            tuple(sorted(ignored_reservoirs or ())),
+            since,
+            tuple(sorted(resample_kwargs.items())),
+        )
+
+        def factory() -> pd.DataFrame:
+            return self._resample(rule, columns, ignored_reservoirs, since, resample_kwargs)
+
+        return self.memoized(key, factory).copy()
+
+    def _resample(
+        self,
+        rule: str,
+        columns: Sequence[str],
+        ignored_reservoirs: Sequence[str] | None,
+        since: dt.datetime | None,
+        resample_kwargs: dict[str, Any],
+    ) -> pd.DataFrame:
+        df = self._df_base
+
+        if ignored_reservoirs:
+            df = df.loc[~df["name"].isin(ignored_reservoirs)]
+
+        if since is not None:
+            df = df.loc[df["ts_measured"] > since]
+
+        df_res = pd.DataFrame(
+            {
+                "id": reservoir_ids(df),
+                **{column: df[column] for column in columns},
+            },
+        )
+        df_res.index = pd.DatetimeIndex(df["ts_measured"]).tz_convert("Europe/Berlin")
+
+        df_resampled: pd.DataFrame = (
+            df_res.groupby(["id"])
+            .resample(rule, **resample_kwargs)
+            .aggregate({column: "median" for column in columns})
+        )
+
+        # Create a new MultiIndex with all permutations of 'id' and 'ts_measured'. Sort the
+        # timestamps, so reservoirs whose measurements start earlier or end earlier than
+        # those of the first one are forward filled in the right order
+        idx = df_resampled.index
+        multi_idx = pd.MultiIndex.from_product(
+            [
+                idx.get_level_values(level=0).unique(),
+                idx.get_level_values(level=1).unique().sort_values(),
+            ],
+            names=["id", "ts_measured"],
+        )
+
+        # Reindex DataFrame and forward fill missing values from those of the same station
+        df_resampled = df_resampled.reindex(multi_idx)
+        return df_resampled.groupby(level=0).ffill()
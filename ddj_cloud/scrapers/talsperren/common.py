@@ -1,17 +1,26 @@
+import contextvars
 import datetime as dt
 from abc import abstractmethod
-from collections.abc import Callable, Generator, Iterable
+from collections.abc import Callable, Generator, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from io import BytesIO
-from typing import Protocol, TypedDict, TypeVar
+from typing import TYPE_CHECKING, Protocol, TypedDict, TypeVar
 from zoneinfo import ZoneInfo
 
 import pandas as pd
 import sentry_sdk
 
+# Only for annotations, as the aggregates module uses this one
+if TYPE_CHECKING:
+    from .aggregates import AggregateCache, Resampled
+
 TZ_UTC = ZoneInfo("UTC")
 TZ_BERLIN = ZoneInfo("Europe/Berlin")
 
+# Concurrent requests to the site of one federation
+MAX_CONCURRENT_REQUESTS = 4
+
 
 FEDERATION_RENAMES = {
     "Wahnbachtalsperrenverband": "Wahnbachtalsperren-Verband",
@@ -68,6 +77,33 @@ class ReservoirRecord:
     content_mio_m3: float
 
 
+# Compact dtypes of the stored and base data. The strings repeat for every measurement, so
+# they are categorical
+BASE_DTYPES = {
+    "federation_name": "category",
+    "name": "category",
+    "main_purpose": "category",
+}
+
+
+def with_base_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast the columns of ``df`` to the compact ``BASE_DTYPES``, where present."""
+    return df.astype({column: dtype for column, dtype in BASE_DTYPES.items() if column in df})
+
+
+def reservoir_ids(df: pd.DataFrame) -> pd.Series:
+    """Unique id of the reservoir of each row, ``<federation_name>_<name>``."""
+    return df["federation_name"].astype(str) + "_" + df["name"].astype(str)
+
+
+def with_plain_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Turn categorical columns back into plain strings.
+
+    For small frames that are exported, so renaming works as usual.
+    """
+    return df.astype({column: "object" for column in df.select_dtypes("category").columns})
+
+
 class ReservoirMeta(TypedDict):
     capacity_mio_m3: float
     lat: float
@@ -109,6 +145,31 @@ def apply_guarded[T1, T2](
             sentry_sdk.capture_exception(e)
 
 
+def apply_guarded_concurrent[T1, T2](
+    func: Callable[[T2], T1 | None],
+    data: Iterable[T2],
+    *,
+    max_workers: int = MAX_CONCURRENT_REQUESTS,
+) -> Generator[T1]:
+    """Like ``apply_guarded``, but calls ``func`` for all items concurrently.
+
+    Meant for one request per reservoir. Results are yielded in the order of ``data``.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="reservoir") as executor:
+        # Copy the context so Sentry spans end up in the trace of the caller
+        futures = [executor.submit(contextvars.copy_context().run, func, item) for item in data]
+
+        for future in futures:
+            try:
+                result = future.result()
+                if result is not None:
+                    yield result
+            except Exception as e:
+                print("Skipping due to error:")
+                print(e)
+                sentry_sdk.capture_exception(e)
+
+
 def to_parquet_bio(df: pd.DataFrame, **kwargs) -> BytesIO:
     data: BytesIO = BytesIO()
 
@@ -125,8 +186,14 @@ def to_parquet_bio(df: pd.DataFrame, **kwargs) -> BytesIO:
 class Exporter(Protocol):
     filename: str
 
+    # Shared aggregates used by ``run``, computed ahead of it
+    inputs: Sequence["Resampled"] = ()
+
+    # Whether ``run`` modifies ``df_base`` and needs its own copy of it
+    copy_base: bool = True
+
     def __init__(self) -> None: ...
 
     @abstractmethod
-    def run(self, df_base: pd.DataFrame) -> pd.DataFrame:
+    def run(self, df_base: pd.DataFrame, aggregates: "AggregateCache") -> pd.DataFrame:
         raise NotImplementedError
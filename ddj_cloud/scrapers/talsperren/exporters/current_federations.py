@@ -1,9 +1,12 @@
 import pandas as pd
 
+from ddj_cloud.scrapers.talsperren.aggregates import AggregateCache
 from ddj_cloud.scrapers.talsperren.common import (
     FEDERATION_RENAMES_BREAKS,
     GELSENWASSER_DETAILED,
     Exporter,
+    reservoir_ids,
+    with_plain_dtypes,
 )
 
 
@@ -12,8 +15,8 @@ class CurrentFederationsExporter(Exporter):
 
     filename = "current_federations"
 
-    def run(self, df_base: pd.DataFrame) -> pd.DataFrame:
-        df_base.insert(0, "id", df_base["federation_name"] + "_" + df_base["name"])
+    def run(self, df_base: pd.DataFrame, aggregates: AggregateCache) -> pd.DataFrame:  # noqa: ARG002
+        df_base.insert(0, "id", reservoir_ids(df_base))
 
         # Only use "Haltern und Hullern Gesamt" for now, it should be more reliable
         df_base = df_base[~df_base["name"].isin(GELSENWASSER_DETAILED)]
@@ -25,9 +28,12 @@ class CurrentFederationsExporter(Exporter):
         df_map.sort_values(by="id", inplace=True)
         df_map.reset_index(drop=True, inplace=True)
 
+        # Only one row per reservoir is left, so use plain dtypes again
+        df_map = with_plain_dtypes(df_map)
+
         # Sum by federation
         df_map = (
-            df_map.groupby(["federation_name"])
+            df_map.groupby(["federation_name"], observed=True)
             .aggregate(
                 {
                     "capacity_mio_m3": "sum",
@@ -1,6 +1,7 @@
 import pandas as pd
 from dateutil.relativedelta import relativedelta
 
+from ddj_cloud.scrapers.talsperren.aggregates import AggregateCache, Resampled
 from ddj_cloud.scrapers.talsperren.common import (
     FEDERATION_ORDER_SIZE,
     FEDERATION_RENAMES_BREAKS,
@@ -9,49 +10,25 @@ from ddj_cloud.scrapers.talsperren.common import (
 )
 from ddj_cloud.utils.date_and_time import local_today_midnight
 
+# Only use "Haltern und Hullern Gesamt" for now, it should be more reliable and it has history
+# Drop all data before one month ago (plus some extra so we don't underfill any medians/means)
+DAILY_CONTENT = Resampled(
+    "D",
+    ("content_mio_m3", "capacity_mio_m3"),
+    ignored_reservoirs=tuple(GELSENWASSER_DETAILED),
+    lookback=relativedelta(months=3),
+)
+
 
 class DailyExporter(Exporter):
     filename = "daily"
 
-    def run(self, df_base: pd.DataFrame) -> pd.DataFrame:
-        df_base.insert(0, "id", df_base["federation_name"] + "_" + df_base["name"])
-
-        # Only use "Haltern und Hullern Gesamt" for now, it should be more reliable and it has history
-        df_base = df_base[~df_base["name"].isin(GELSENWASSER_DETAILED)]
-
-        # Drop all data before one month ago (plus some extra so we don't underfill any medians/means)
-        df_base = df_base.loc[
-            df_base["ts_measured"] > local_today_midnight() - relativedelta(months=3)
-        ]
-
-        # First, set the 'ts_measured' column as the DataFrame index
-        df_base.set_index("ts_measured", inplace=True)
-        df_base.index = df_base.index.tz_convert("Europe/Berlin")  # type: ignore
-
-        # Group by 'federation_name' and 'name', then resample to daily frequency using median
-        df_daily: pd.DataFrame = (
-            df_base.groupby(
-                ["id"],
-            )
-            .resample("D")
-            .aggregate(
-                {
-                    "content_mio_m3": "median",
-                    "capacity_mio_m3": "median",
-                }
-            )
-        )
-
-        # Create a new MultiIndex with all permutations of 'id' and 'ts_measured'
-        idx = df_daily.index
-        multi_idx = pd.MultiIndex.from_product(
-            [idx.get_level_values(level=0).unique(), idx.get_level_values(level=1).unique()],
-            names=["id", "ts_measured"],
-        )
+    inputs = (DAILY_CONTENT,)
+    copy_base = False
 
-        # Reindex DataFrame and forward fill missing values from those of the same station
-        df_daily = df_daily.reindex(multi_idx)
-        df_daily = df_daily.groupby(level=0).ffill()
+    def run(self, df_base: pd.DataFrame, aggregates: AggregateCache) -> pd.DataFrame:  # noqa: ARG002
+        # Resample each reservoir to daily frequency using median
+        df_daily = aggregates.get(DAILY_CONTENT)
 
         # Reconstruct the 'federation_name' (and 'name') columns
         # df_weekly["federation_name"], df_weekly["name"] = (
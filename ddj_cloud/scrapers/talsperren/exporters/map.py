@@ -4,6 +4,7 @@ import pandas as pd
 from dateutil.relativedelta import relativedelta
 from slugify import slugify
 
+from ddj_cloud.scrapers.talsperren.aggregates import AggregateCache, Resampled
 from ddj_cloud.scrapers.talsperren.common import (
     FEDERATION_RENAMES,
     GELSENWASSER_DETAILED,
@@ -11,6 +12,8 @@ from ddj_cloud.scrapers.talsperren.common import (
     RESERVOIR_RENAMES,
     RESERVOIR_RENAMES_BREAKS,
     Exporter,
+    reservoir_ids,
+    with_plain_dtypes,
 )
 from ddj_cloud.scrapers.talsperren.federations.agger import AggerFederation
 from ddj_cloud.scrapers.talsperren.federations.eifel_rur import EifelRurFederation
@@ -24,156 +27,89 @@ from ddj_cloud.utils.date_and_time import local_today_midnight
 class MapExporter(Exporter):
     filename = "map"
 
-    def _add_daily_fill_percent_to_map(
-        self, df_base: pd.DataFrame, df_map: pd.DataFrame
-    ) -> pd.DataFrame:
-        # Resample df to daily
-        df_res = df_base.copy()
-        # First, set the 'ts_measured' column as the DataFrame index
-        df_res.set_index("ts_measured", inplace=True)
-        df_res.index = df_res.index.tz_convert("Europe/Berlin")  # type: ignore
-
-        # Group by 'federation_name' and 'name', then resample to daily frequency using median
-        df_daily: pd.DataFrame = (
-            df_res.groupby(
-                ["id"],
-            )
-            .resample("D")
-            .aggregate(
-                {
-                    "fill_percent": "median",
-                }
-            )
-        )
+    copy_base = False
 
-        # Create a new MultiIndex with all permutations of 'id' and 'ts_measured'
-        idx = df_daily.index
-        multi_idx = pd.MultiIndex.from_product(
-            [idx.get_level_values(level=0).unique(), idx.get_level_values(level=1).unique()],
-            names=["id", "ts_measured"],
-        )
+    do_reservoir_rename = True
 
-        # Reindex DataFrame and forward fill missing values from those of the same station
-        df_daily = df_daily.reindex(multi_idx)
-        df_daily = df_daily.groupby(level=0).ffill()
+    # Only use "Haltern und Hullern Gesamt" by default for now, it should be more reliable and it has history
+    # Overridden for filtered maps
+    ignored_reservoirs: list[str] | None = GELSENWASSER_DETAILED
 
-        # Add a new column to `df_map` for each of the last 7 days
+    @property
+    def inputs(self) -> tuple[Resampled, ...]:  # type: ignore[override]
+        ignored_reservoirs = tuple(self.ignored_reservoirs or ())
+        return (
+            Resampled("D", ("fill_percent",), ignored_reservoirs=ignored_reservoirs),
+            Resampled(
+                "W",
+                ("fill_percent",),
+                ignored_reservoirs=ignored_reservoirs,
+                closed="right",
+                label="left",
+            ),
+            Resampled(
+                "ME",
+                ("fill_percent",),
+                ignored_reservoirs=ignored_reservoirs,
+                closed="right",
+                label="left",
+            ),
+        )
+
+    def _daily_fill_percent(self, df_daily: pd.DataFrame) -> pd.DataFrame:
+        # A column for each of the last 7 days
         today_midnight = local_today_midnight()
-        for days_offset in range(0, 8):
+        periods = {
             # Use Python to calculate the timestamp for correct timezone support,
             # then convert to pandas
-            ts = today_midnight - relativedelta(days=days_offset)
-            ts = pd.Timestamp(ts)
-            try:
-                df_day = df_daily.loc[(slice(None), ts), :].reset_index(level=1, drop=True)
-                df_day.rename(
-                    columns={"fill_percent": f"fill_percent_day_{days_offset}"},
-                    inplace=True,
-                )
-                df_map = df_map.merge(df_day, how="left", on="id")
-            except KeyError:  # no data for this day
-                df_map[f"fill_percent_day_{days_offset}"] = pd.NA
-
-        return df_map
-
-    def _add_weekly_fill_percent_to_map(
-        self, df_base: pd.DataFrame, df_map: pd.DataFrame
-    ) -> pd.DataFrame:
-        # Resample df to weekly
-        df_res = df_base.copy()
-
-        # First, set the 'ts_measured' column as the DataFrame index
-        df_res.set_index("ts_measured", inplace=True)
-        df_res.index = df_res.index.tz_convert("Europe/Berlin")  # type: ignore
-
-        # Group by 'id', then resample to weekly frequency using median
-        df_weekly: pd.DataFrame = (
-            df_res.groupby(
-                ["id"],
-            )
-            .resample("W", closed="right", label="left")
-            .aggregate(
-                {
-                    "fill_percent": "median",
-                }
+            f"fill_percent_day_{days_offset}": pd.Timestamp(
+                today_midnight - relativedelta(days=days_offset)
             )
-        )
-
-        # Create a new MultiIndex with all permutations of 'id' and 'ts_measured'
-        idx = df_weekly.index
-        multi_idx = pd.MultiIndex.from_product(
-            [idx.get_level_values(level=0).unique(), idx.get_level_values(level=1).unique()],
-            names=["id", "ts_measured"],
-        )
+            for days_offset in range(0, 8)
+        }
+        return _select_periods(df_daily, periods)
 
-        # Reindex DataFrame and forward fill missing values from those of the same station
-        df_weekly = df_weekly.reindex(multi_idx)
-        df_weekly = df_weekly.groupby(level=0).ffill()
-
-        # Add a new column to `df_map` for each of the last 6 weeks
+    def _weekly_fill_percent(self, df_weekly: pd.DataFrame) -> pd.DataFrame:
+        # A column for each of the last 13 weeks
         today_midnight = local_today_midnight()
         current_week = today_midnight - relativedelta(days=today_midnight.weekday() + 1)
-
-        for weeks_offset in range(0, 13):
-            ts = current_week - relativedelta(weeks=weeks_offset)
-            ts = pd.Timestamp(ts)
-            df_week = df_weekly.loc[(slice(None), ts), :].reset_index(level=1, drop=True)
-            df_week.rename(
-                columns={"fill_percent": f"fill_percent_week_{weeks_offset}"},
-                inplace=True,
-            )
-            df_map = df_map.merge(df_week, how="left", on="id")
-
-        return df_map
-
-    def _add_monthly_fill_percent_to_map(
-        self, df_base: pd.DataFrame, df_map: pd.DataFrame
-    ) -> pd.DataFrame:
-        # Resample df to monthly
-        df_res = df_base.copy()
-
-        # First, set the 'ts_measured' column as the DataFrame index
-        df_res.set_index("ts_measured", inplace=True)
-        df_res.index = df_res.index.tz_convert("Europe/Berlin")  # type: ignore
-
-        # Group by 'id', then resample to monthly frequency using median
-        df_monthly: pd.DataFrame = (
-            df_res.groupby(
-                ["id"],
-            )
-            .resample("ME", closed="right", label="left")
-            .aggregate(
-                {
-                    "fill_percent": "median",
-                }
+        periods = {
+            f"fill_percent_week_{weeks_offset}": pd.Timestamp(
+                current_week - relativedelta(weeks=weeks_offset)
             )
-        )
-
-        # Create a new MultiIndex with all permutations of 'id' and 'ts_measured'
-        idx = df_monthly.index
-        multi_idx = pd.MultiIndex.from_product(
-            [idx.get_level_values(level=0).unique(), idx.get_level_values(level=1).unique()],
-            names=["id", "ts_measured"],
-        )
+            for weeks_offset in range(0, 13)
+        }
+        return _select_periods(df_weekly, periods)
 
-        # Reindex DataFrame and forward fill missing values from those of the same station
-        df_monthly = df_monthly.reindex(multi_idx)
-        df_monthly = df_monthly.groupby(level=0).ffill()
-
-        # Add a new column to `df_map` for each of the last 6 months
+    def _monthly_fill_percent(self, df_monthly: pd.DataFrame) -> pd.DataFrame:
+        # A column for each of the last 13 months
         today_midnight = local_today_midnight()
         current_month = today_midnight.replace(day=1)
-        for months_offset in range(0, 13):
-            ts = current_month - relativedelta(months=months_offset, days=1)
-            ts = pd.Timestamp(ts)
-            df_month = df_monthly.loc[(slice(None), ts), :].reset_index(level=1, drop=True)
-            df_month.rename(
-                columns={"fill_percent": f"fill_percent_month_{months_offset}"},
-                inplace=True,
+        periods = {
+            f"fill_percent_month_{months_offset}": pd.Timestamp(
+                current_month - relativedelta(months=months_offset, days=1)
             )
-            df_map = df_map.merge(df_month, how="left", on="id")
+            for months_offset in range(0, 13)
+        }
+        return _select_periods(df_monthly, periods)
 
-        return df_map
+    def _add_fill_percent_to_map(
+        self,
+        aggregates: AggregateCache,
+        df_map: pd.DataFrame,
+    ) -> pd.DataFrame:
+        # Each reservoir resampled to daily, weekly and monthly frequency using median
+        df_daily, df_weekly, df_monthly = (aggregates.get(spec) for spec in self.inputs)
+
+        df_periods = pd.concat(
+            [
+                self._daily_fill_percent(df_daily),
+                self._weekly_fill_percent(df_weekly),
+                self._monthly_fill_percent(df_monthly),
+            ],
+            axis=1,
+        )
+        return df_map.merge(df_periods, how="left", on="id")
 
     def _add_marker_size(self, df_map: pd.DataFrame) -> pd.DataFrame:
         source_column = df_map["capacity_mio_m3"]
@@ -185,34 +121,30 @@ class MapExporter(Exporter):
         )
         return df_map
 
-    def run(
-        self,
-        df_base: pd.DataFrame,
-        do_reservoir_rename: bool = True,
-        # Only use "Haltern und Hullern Gesamt" by default for now, it should be more reliable and it has history
-        # Overridden for filtered maps
-        ignored_reservoirs: list[str] | None = GELSENWASSER_DETAILED,
-    ) -> pd.DataFrame:
-        df_base.insert(0, "id", df_base["federation_name"] + "_" + df_base["name"])
+    def run(self, df_base: pd.DataFrame, aggregates: AggregateCache) -> pd.DataFrame:
+        # The filtered maps only select from the same map, so build each variant once per run
+        key = ("map", self.do_reservoir_rename, tuple(self.ignored_reservoirs or ()))
+        df_map = aggregates.memoized(key, lambda: self._build_map(df_base, aggregates))
+        return df_map.copy()
 
-        if ignored_reservoirs:
-            df_base = df_base[~df_base["name"].isin(ignored_reservoirs)]
+    def _build_map(self, df_base: pd.DataFrame, aggregates: AggregateCache) -> pd.DataFrame:
+        if self.ignored_reservoirs:
+            df_base = df_base[~df_base["name"].isin(self.ignored_reservoirs)]
 
-        # Gernerate map with latest data
+        # Gernerate map with latest data. ``df_base`` is shared with other exporters, so
+        # only modify the copy
         df_map = df_base.copy()
+        df_map.insert(0, "id", reservoir_ids(df_map))
         df_map.sort_values(by=["ts_measured"], inplace=True)
         df_map.drop_duplicates(subset="id", keep="last", inplace=True)
         df_map.sort_values(by="id", inplace=True)
         df_map.reset_index(drop=True, inplace=True)
 
-        # Add daily fill ratio
-        df_map = self._add_daily_fill_percent_to_map(df_base, df_map)
-
-        # Add weekly fill ratio
-        df_map = self._add_weekly_fill_percent_to_map(df_base, df_map)
+        # Only one row per reservoir is left, so use plain dtypes again
+        df_map = with_plain_dtypes(df_map)
 
-        # Add monthly fill ratio
-        df_map = self._add_monthly_fill_percent_to_map(df_base, df_map)
+        # Add daily, weekly and monthly fill ratio
+        df_map = self._add_fill_percent_to_map(aggregates, df_map)
 
         # Add marker size
         df_map = self._add_marker_size(df_map)
@@ -225,7 +157,7 @@ class MapExporter(Exporter):
             FEDERATION_RENAMES,
         )
 
-        if do_reservoir_rename:
+        if self.do_reservoir_rename:
             df_map["name"] = df_map["name"].replace(
                 RESERVOIR_RENAMES,
             )
@@ -233,6 +165,25 @@ class MapExporter(Exporter):
         return df_map
 
 
+def _select_periods(df_res: pd.DataFrame, periods: dict[str, pd.Timestamp]) -> pd.DataFrame:
+    """Select the ``fill_percent`` of the given periods from resampled data, one column each.
+
+    Columns of periods without any data are ``pd.NA``.
+    """
+    fill_percent = df_res["fill_percent"]
+    ts_measured = fill_percent.index.get_level_values("ts_measured")
+
+    df_periods = fill_percent[ts_measured.isin(list(periods.values()))].unstack("ts_measured")
+    df_periods = df_periods.reindex(columns=list(periods.values()))
+    df_periods.columns = list(periods.keys())
+
+    for column, ts in periods.items():
+        if ts not in ts_measured:
+            df_periods[column] = pd.NA
+
+    return df_periods
+
+
 def _sort_with_special_cases(df: pd.DataFrame, pairs: list[tuple[str, str]]):
     df.insert(0, "__sort", df["capacity_mio_m3"] * 1_000_000.0)
 
@@ -252,19 +203,14 @@ def _make_filtered_map_exporter(federation_names: Sequence[str]) -> MapExporter:
     class FilteredMapExporter(MapExporter):
         filename = f"filtered_map_{slugify('_'.join(federation_names))}"
 
-        def run(
-            self,
-            df_base: pd.DataFrame,
-            do_reservoir_rename: bool = False,
-            # For filtered maps, ignore "Haltern und Hullern Gesamt" because we don't use the
-            # history anyways and prefer detailed data for current fill level
-            ignored_reservoirs: list[str] | None = GELSENWASSER_GESAMT,
-        ) -> pd.DataFrame:
-            df_map = super().run(
-                df_base,
-                do_reservoir_rename=do_reservoir_rename,
-                ignored_reservoirs=ignored_reservoirs,
-            )
+        do_reservoir_rename = False
+
+        # For filtered maps, ignore "Haltern und Hullern Gesamt" because we don't use the
+        # history anyways and prefer detailed data for current fill level
+        ignored_reservoirs = GELSENWASSER_GESAMT
+
+        def run(self, df_base: pd.DataFrame, aggregates: AggregateCache) -> pd.DataFrame:
+            df_map = super().run(df_base, aggregates)
 
             translated_names = [
                 FEDERATION_RENAMES.get(fed_name, fed_name) for fed_name in federation_names
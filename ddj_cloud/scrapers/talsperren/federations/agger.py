@@ -1,15 +1,14 @@
 import datetime as dt
 from collections.abc import Iterable
 
-import requests
-
 from ddj_cloud.scrapers.talsperren.common import (
     TZ_UTC,
     Federation,
     ReservoirMeta,
     ReservoirRecord,
-    apply_guarded,
+    apply_guarded_concurrent,
 )
+from ddj_cloud.utils import http
 
 
 class AggerReservoirMeta(ReservoirMeta):
@@ -44,7 +43,7 @@ class AggerFederation(Federation):
     }
 
     def _get_reservoir_records(self, name: str) -> list[ReservoirRecord]:
-        data = requests.get(self.reservoirs[name]["url"]).json()
+        data = http.get(self.reservoirs[name]["url"]).json()
         columns: list[str] = data[0]["columns"].split(",")
         assert len(data) == 1, "Expected exactly one data set"
         assert all([column in columns for column in ["Timestamp", "Value"]]), (
@@ -71,5 +70,7 @@ class AggerFederation(Federation):
         self,
         **kwargs,  # noqa: ARG002
     ) -> Iterable[ReservoirRecord]:
-        for records in apply_guarded(self._get_reservoir_records, self.reservoirs.keys()):
+        for records in apply_guarded_concurrent(
+            self._get_reservoir_records, self.reservoirs.keys()
+        ):
             yield from records
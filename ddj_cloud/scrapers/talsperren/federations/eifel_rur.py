@@ -3,15 +3,14 @@ from collections.abc import Iterable
 from typing import NotRequired
 from urllib.parse import quote
 
-import requests
-
 from ddj_cloud.scrapers.talsperren.common import (
     TZ_BERLIN,
     Federation,
     ReservoirMeta,
     ReservoirRecord,
-    apply_guarded,
+    apply_guarded_concurrent,
 )
+from ddj_cloud.utils import http
 
 BASE_URL = "https://wver.de/karten_messwerte/Messdatenportal/Messdaten/"
 
@@ -89,7 +88,7 @@ class EifelRurFederation(Federation):
         return f"{BASE_URL}{quote(station_name)}TalsperreninhaltTag.Mittel.json"
 
     def _get_json(self, url: str):
-        return requests.get(url).json()
+        return http.get(url).json()
 
     def _get_reservoir_records(self, name: str) -> list[ReservoirRecord]:
         if self.reservoirs[name].get("skip", False):
@@ -119,7 +118,7 @@ class EifelRurFederation(Federation):
         self,
         **kwargs,  # noqa: ARG002
     ) -> Iterable[ReservoirRecord]:
-        for records in apply_guarded(
+        for records in apply_guarded_concurrent(
             self._get_reservoir_records,
             self.reservoirs.keys(),
         ):
@@ -4,7 +4,6 @@ from functools import lru_cache
 
 import bs4
 import dateparser
-import requests
 import sentry_sdk
 
 from ddj_cloud.scrapers.talsperren.common import (
@@ -14,6 +13,7 @@ from ddj_cloud.scrapers.talsperren.common import (
     ReservoirRecord,
     apply_guarded,
 )
+from ddj_cloud.utils import http_cache
 
 
 class GelsenwasserReservoirMeta(ReservoirMeta):
@@ -22,7 +22,7 @@ class GelsenwasserReservoirMeta(ReservoirMeta):
 
 @lru_cache
 def _get_html(url: str) -> str:
-    return requests.get(url).text
+    return http_cache.get(url).text
 
 
 class GelsenwasserFederation(Federation):
@@ -3,7 +3,6 @@ import re
 from collections.abc import Iterable
 
 import bs4
-import requests
 
 from ddj_cloud.scrapers.talsperren.common import (
     TZ_BERLIN,
@@ -11,6 +10,7 @@ from ddj_cloud.scrapers.talsperren.common import (
     ReservoirRecord,
     apply_guarded,
 )
+from ddj_cloud.utils import http
 
 
 class RuhrFederation(Federation):
@@ -76,7 +76,7 @@ class RuhrFederation(Federation):
     }
 
     def _get_html(self) -> str:
-        return requests.get(self.url).text
+        return http.get(self.url).text
 
     def _parse_coord_div(self, div: bs4.Tag) -> ReservoirRecord:
         name: str = div["title"]  # type: ignore
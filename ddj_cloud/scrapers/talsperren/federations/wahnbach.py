@@ -3,7 +3,6 @@ from collections.abc import Generator, Iterable
 
 import bs4
 import dateparser
-import requests
 
 from ddj_cloud.scrapers.talsperren.common import (
     TZ_BERLIN,
@@ -12,6 +11,7 @@ from ddj_cloud.scrapers.talsperren.common import (
     ReservoirRecord,
     apply_guarded,
 )
+from ddj_cloud.utils import http_cache
 
 
 class WahnbachReservoirMeta(ReservoirMeta):
@@ -32,7 +32,7 @@ class WahnbachReservoirFederation(Federation):
     }
 
     def _get_html(self, url: str) -> str:
-        return requests.get(url, timeout=10).text
+        return http_cache.get(url, timeout=10).text
 
     def _get_reservoir_records(
         self,
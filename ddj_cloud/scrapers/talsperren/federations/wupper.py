@@ -1,15 +1,14 @@
 import datetime as dt
 from collections.abc import Iterable
 
-import requests
-
 from ddj_cloud.scrapers.talsperren.common import (
     TZ_UTC,
     Federation,
     ReservoirMeta,
     ReservoirRecord,
-    apply_guarded,
+    apply_guarded_concurrent,
 )
+from ddj_cloud.utils import http
 
 
 class WupperReservoirMeta(ReservoirMeta):
@@ -141,7 +140,7 @@ class WupperFederation(Federation):
 
     def _get_reservoir_records(self, name: str) -> list[ReservoirRecord]:
         url = self._build_url(self.reservoirs[name]["ajax_id"])
-        response = requests.get(url).json()
+        response = http.get(url).json()
         content_data = response["Speicherinhalt"]
 
         # If no data is available, content_data is an empty list
@@ -172,5 +171,7 @@ class WupperFederation(Federation):
         self,
         **kwargs,  # noqa: ARG002
     ) -> Iterable[ReservoirRecord]:
-        for records in apply_guarded(self._get_reservoir_records, self.reservoirs.keys()):
+        for records in apply_guarded_concurrent(
+            self._get_reservoir_records, self.reservoirs.keys()
+        ):
             yield from records
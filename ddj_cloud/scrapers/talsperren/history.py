@@ -0,0 +1,231 @@
+"""Partitioned storage of the measurement history.
+
+The history is stored as one parquet file per federation and month of ``ts_measured``
+(UTC), at ``talsperren/history/federation=<slug>/year=YYYY/month=MM/part.parquet``. A run
+only rewrites the partitions its new measurements fall into.
+
+Older months rarely change, so they are also kept assembled in a single file (see
+``read_assembled``). It is only updated when the requested partitions change, e.g. when a
+month moves out of the range the exporters need.
+
+The single file ``talsperren/data.parquet.gzip`` used before is migrated on first use.
+It is kept as a backup, but not updated anymore.
+"""
+
+import datetime as dt
+import hashlib
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import pandas as pd
+
+from ddj_cloud.utils.storage import (
+    DownloadFailedException,
+    delete_file,
+    download_file,
+    list_files,
+    upload_file,
+)
+
+from .common import to_parquet_bio, with_base_dtypes
+
+HISTORY_PREFIX = "talsperren/history"
+LEGACY_FILENAME = "talsperren/data.parquet.gzip"
+ASSEMBLED_MANIFEST = f"{HISTORY_PREFIX}/assembled.json"
+
+MAX_CONCURRENT_DOWNLOADS = 8
+
+_PARTITION_PATTERN = re.compile(
+    rf"^{HISTORY_PREFIX}/federation=(?P<federation>[^/]+)"
+    r"/year=(?P<year>\d{4})/month=(?P<month>\d{2})/part\.parquet$"
+)
+
+
+class Partition(NamedTuple):
+    federation: str
+    year: int
+    month: int
+
+    @property
+    def filename(self) -> str:
+        return (
+            f"{HISTORY_PREFIX}/federation={self.federation}"
+            f"/year={self.year:04d}/month={self.month:02d}/part.parquet"
+        )
+
+
+def _slugify(federation_name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", federation_name.lower()).strip("-")
+
+
+def _partition_columns(df: pd.DataFrame) -> list[pd.Series]:
+    ts_measured = df["ts_measured"].dt.tz_convert("UTC")
+    return [
+        df["federation_name"].map(_slugify).rename("federation"),
+        ts_measured.dt.year.rename("year"),
+        ts_measured.dt.month.rename("month"),
+    ]
+
+
+def partitions_of(df: pd.DataFrame) -> set[Partition]:
+    """Get the partitions the rows of ``df`` belong to."""
+    if df.empty:
+        return set()
+
+    keys = pd.concat(_partition_columns(df), axis=1).drop_duplicates()
+    return {Partition(*key) for key in keys.itertuples(index=False)}
+
+
+def list_partitions() -> set[Partition]:
+    """List all partitions in storage."""
+    partitions = set()
+    for filename in list_files(f"{HISTORY_PREFIX}/"):
+        match = _PARTITION_PATTERN.match(filename)
+        if match is None:
+            continue
+        partitions.add(
+            Partition(match["federation"], int(match["year"]), int(match["month"])),
+        )
+    return partitions
+
+
+def _read_partition(partition: Partition) -> pd.DataFrame:
+    return pd.read_parquet(download_file(partition.filename), engine="fastparquet")
+
+
+def read_partitions(partitions: set[Partition]) -> pd.DataFrame | None:
+    """Download and concatenate the given partitions. Returns None if there are none."""
+    if not partitions:
+        return None
+
+    with ThreadPoolExecutor(
+        max_workers=MAX_CONCURRENT_DOWNLOADS,
+        thread_name_prefix="history",
+    ) as executor:
+        dfs = list(executor.map(_read_partition, sorted(partitions)))
+
+    # Partitions written at different times may have different categories
+    return with_base_dtypes(pd.concat(dfs, ignore_index=True))
+
+
+def write_partitions(df: pd.DataFrame, partitions: set[Partition]) -> None:
+    """Write the rows of ``df`` belonging to ``partitions``, replacing their stored data.
+
+    ``df`` must contain all rows of these partitions, not just new ones. Partitions whose
+    measurements didn't change aren't uploaded again.
+    """
+    if not partitions:
+        return
+
+    for key, df_group in df.groupby(_partition_columns(df), sort=False, observed=True):
+        partition = Partition(*key)
+        if partition not in partitions:
+            continue
+
+        df_partition = with_base_dtypes(df_group.sort_values(["name", "ts_measured"]))
+
+        # Ignore the scrape time, so re-fetched but unchanged measurements are not uploaded
+        hashes = pd.util.hash_pandas_object(
+            df_partition.drop(columns=["ts_scraped"]),
+            index=False,
+        )
+        ident = hashlib.sha256(hashes.to_numpy().tobytes()).hexdigest()
+
+        upload_file(
+            to_parquet_bio(df_partition, compression="gzip", index=False),
+            partition.filename,
+            ident=ident,
+        )
+
+
+def _assembled_filename(partitions: set[Partition]) -> str:
+    digest = hashlib.sha256(
+        "\n".join(partition.filename for partition in sorted(partitions)).encode("utf-8"),
+    ).hexdigest()
+    return f"{HISTORY_PREFIX}/assembled-{digest[:16]}.parquet"
+
+
+def _load_assembled() -> tuple[pd.DataFrame | None, set[Partition], str | None]:
+    try:
+        manifest = json.load(download_file(ASSEMBLED_MANIFEST))
+        df = pd.read_parquet(download_file(manifest["filename"]), engine="fastparquet")
+    except DownloadFailedException:
+        return None, set(), None
+
+    return df, {Partition(*key) for key in manifest["partitions"]}, manifest["filename"]
+
+
+def read_assembled(partitions: set[Partition]) -> pd.DataFrame | None:
+    """Like ``read_partitions``, but from a single file assembled on earlier calls.
+
+    Only partitions the file doesn't contain yet are downloaded, and those that are no longer
+    requested are dropped from it. The file is only updated if that changed anything. A
+    partition that was rewritten must not be requested in the same run, so it is replaced
+    with its new version on the next one.
+    """
+    if not partitions:
+        return None
+
+    df, contained, filename = _load_assembled()
+    if df is not None and contained == partitions:
+        return with_base_dtypes(df)
+
+    dfs = []
+    if df is not None:
+        keys = pd.MultiIndex.from_arrays(_partition_columns(df))
+        dfs.append(df[keys.isin(list(contained & partitions))])
+
+    df_added = read_partitions(partitions - contained)
+    if df_added is not None:
+        dfs.append(df_added)
+
+    df = with_base_dtypes(pd.concat(dfs, ignore_index=True))
+
+    # Write the new file before switching to it, so the manifest never points to a partial one
+    new_filename = _assembled_filename(partitions)
+    upload_file(
+        to_parquet_bio(df, compression="gzip", index=False),
+        new_filename,
+        acl=None,
+        archive=False,
+    )
+    upload_file(
+        json.dumps(
+            {"filename": new_filename, "partitions": sorted(partitions)},
+        ).encode("utf-8"),
+        ASSEMBLED_MANIFEST,
+        content_type="application/json",
+        acl=None,
+        archive=False,
+    )
+    if filename is not None and filename != new_filename:
+        delete_file(filename)
+
+    return df
+
+
+def _migrate_legacy() -> set[Partition]:
+    try:
+        df = pd.read_parquet(download_file(LEGACY_FILENAME), engine="fastparquet")
+    except DownloadFailedException:
+        return set()
+
+    print(f"Migrating {LEGACY_FILENAME} to partitions in {HISTORY_PREFIX}/")
+    partitions = partitions_of(df)
+    write_partitions(df, partitions)
+    return partitions
+
+
+def stored_partitions() -> set[Partition]:
+    """List the stored partitions, migrating the legacy single file if there are none yet.
+
+    An empty result means there is no history at all.
+    """
+    return list_partitions() or _migrate_legacy()
+
+
+def partitions_since(partitions: set[Partition], since: dt.date) -> set[Partition]:
+    """Select the partitions of the months from ``since`` on, including its own month."""
+    return {p for p in partitions if (p.year, p.month) >= (since.year, since.month)}
@@ -7,7 +7,11 @@ import pandas as pd
 import sentry_sdk
 from datawrapper import Datawrapper
 
-from ddj_cloud.scrapers.talsperren.common import FEDERATION_RENAMES, RESERVOIR_RENAMES
+from ddj_cloud.scrapers.talsperren.common import (
+    FEDERATION_RENAMES,
+    RESERVOIR_RENAMES,
+    reservoir_ids,
+)
 from ddj_cloud.utils.date_and_time import BERLIN
 from ddj_cloud.utils.formatting import format_datetime, format_number
 
@@ -135,7 +139,7 @@ def run(df_base: pd.DataFrame) -> None:
     assert DATAWRAPPER_TOKEN is not None
 
     # Drop everything but the latest data
-    df_base.insert(0, "id", df_base["federation_name"] + "_" + df_base["name"])
+    df_base.insert(0, "id", reservoir_ids(df_base))
     df_base.sort_values(by=["ts_measured"], inplace=True)
     df_base.drop_duplicates(subset="id", keep="last", inplace=True)
 
@@ -5,6 +5,7 @@ import pandas as pd
 import sentry_sdk
 from datawrapper import Datawrapper
 
+from .common import reservoir_ids
 from .locator_maps import RENAMES
 
 DATAWRAPPER_TOKEN = os.environ.get("TALSPERREN_DATAWRAPPER_TOKEN")
@@ -70,7 +71,7 @@ def run(df_base: pd.DataFrame) -> None:
     assert DATAWRAPPER_TOKEN is not None
 
     # Drop everything but the latest data
-    df_base.insert(0, "id", df_base["federation_name"] + "_" + df_base["name"])
+    df_base.insert(0, "id", reservoir_ids(df_base))
     df_base.sort_values(by=["ts_measured"], inplace=True)
     df_base.drop_duplicates(subset="id", keep="last", inplace=True)
 
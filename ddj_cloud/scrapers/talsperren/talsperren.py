@@ -1,21 +1,31 @@
+import contextvars
 import datetime as dt
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import fields
 from os import getenv
 from traceback import print_exc
 
 import pandas as pd
 import sentry_sdk
+from dateutil.relativedelta import relativedelta
 
 from ddj_cloud.scrapers.talsperren.exporters.map import filtered_map_exporters
-from ddj_cloud.utils.storage import (
-    DownloadFailedException,
-    download_file,
-    upload_dataframe,
-    upload_file,
+from ddj_cloud.utils.date_and_time import local_today
+from ddj_cloud.utils.storage import upload_dataframe, upload_file
+from ddj_cloud.utils.tracing import OP_EXPORT, OP_FETCH, OP_TRANSFORM, span
+
+from . import history, locator_maps
+from .aggregates import AggregateCache
+from .common import (
+    Exporter,
+    Federation,
+    ReservoirMeta,
+    ReservoirRecord,
+    to_parquet_bio,
+    with_base_dtypes,
 )
 
-from . import locator_maps
-from .common import Exporter, Federation, ReservoirMeta, ReservoirRecord, to_parquet_bio
-
 IGNORE_LIST = [
     "Rurtalsperre Gesamt",
 ]
@@ -25,6 +35,28 @@ IGNORE_LIST = [
 FILL_RATIO_THRESHOLD_LOW = 0.10  # 10%
 FILL_RATIO_THRESHOLD_HIGH = 1.10  # 110%
 
+# Federations are fetched concurrently, a federation that takes longer is skipped. This only
+# stops waiting for it, Python threads can't be cancelled. Its remaining requests still run
+# in the background, each limited by the timeout of ``ddj_cloud.utils.http``, and a local
+# process waits for them before it exits
+FEDERATION_TIMEOUT_SECONDS = 180
+
+# Only measurements since the last stored one of each reservoir, minus this overlap, are
+# merged into the stored data. The overlap picks up late corrections upstream
+INCREMENTAL_OVERLAP = dt.timedelta(days=2)
+
+# Exporters running at the same time
+MAX_EXPORT_WORKERS = 4
+
+# Months of history loaded for the exporters. The weekly exports need a year and three
+# weeks, the monthly map columns the current and the 12 previous months
+HISTORY_MONTHS = 15
+
+# Reservoirs without measurements in these months, e.g. ones that stopped reporting, keep
+# this much of their history before their latest measurement, so the exporters still show
+# them with their latest values. Covers the longest resampling period, a month
+LATEST_HISTORY = dt.timedelta(days=32)
+
 
 def _cleanup_old_data(df: pd.DataFrame) -> pd.DataFrame:
     ### CLEANUP ###
@@ -62,65 +94,137 @@ def _filter_bad_data(df: pd.DataFrame) -> pd.DataFrame:
     ]
 
 
-def _get_base_dataset():
-    # Download existing data
-    df_db = None
+def _fetch_federation(
+    federation: Federation,
+    start: dt.datetime | None,
+    since: dict[tuple[str, str], dt.datetime],
+) -> list[ReservoirRecord]:
+    with span(OP_FETCH, federation.name):
+        return [
+            record
+            for record in federation.get_data(start=start)
+            if (key := (record.federation_name, record.name)) not in since
+            or record.ts_measured >= since[key]
+        ]
+
+
+def _fetch_federations(
+    federations: list[Federation],
+    start: dt.datetime | None,
+    since: dict[tuple[str, str], dt.datetime],
+) -> list[ReservoirRecord]:
+    """Fetch all federations concurrently, skipping those that fail or time out.
+
+    Records of reservoirs in ``since`` are dropped if they are older than the given time.
+    """
+    if not federations:
+        return []
+
+    executor = ThreadPoolExecutor(max_workers=len(federations), thread_name_prefix="federation")
+    futures = [
+        # Copy the context so Sentry spans end up in the trace of the run
+        executor.submit(contextvars.copy_context().run, _fetch_federation, federation, start, since)
+        for federation in federations
+    ]
+    deadline = time.monotonic() + FEDERATION_TIMEOUT_SECONDS
+
+    # Collect in the original order, so the result doesn't depend on timing
+    data: list[ReservoirRecord] = []
     try:
-        bio = download_file("talsperren/data.parquet.gzip")
-        df_db = pd.read_parquet(bio, engine="fastparquet")
+        for federation, future in zip(federations, futures, strict=True):
+            try:
+                data.extend(future.result(timeout=max(0, deadline - time.monotonic())))
+            except Exception as e:
+                error = e
+                if not future.done():
+                    msg = f"{federation.name} timed out after {FEDERATION_TIMEOUT_SECONDS}s"
+                    error = TimeoutError(msg)
+
+                print("Skipping federation due to error:")
+                print_exc()
+                sentry_sdk.capture_exception(error)
+    finally:
+        # Don't wait for federations that timed out, see FEDERATION_TIMEOUT_SECONDS
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return data
+
+
+def _get_base_dataset(window_start: dt.date) -> pd.DataFrame:
+    # Load the stored measurements of the months the exporters need
+    stored_partitions = history.stored_partitions()
+    loaded_partitions = history.partitions_since(stored_partitions, window_start)
+
+    df_db = history.read_partitions(loaded_partitions)
+    if df_db is not None:
         df_db = _cleanup_old_data(df_db)
 
-    except DownloadFailedException:
-        pass
-
-    is_first_run = df_db is None
+    is_first_run = not stored_partitions
 
     start = dt.datetime(1971, 1, 1) if is_first_run else None
 
+    # Per reservoir, the time from which on fetched data is merged
+    since: dict[tuple[str, str], dt.datetime] = {}
+    if df_db is not None:
+        last_measured = df_db.groupby(["federation_name", "name"], observed=True)[
+            "ts_measured"
+        ].max()
+        since = {
+            key: (ts - INCREMENTAL_OVERLAP).to_pydatetime() for key, ts in last_measured.items()
+        }
+
     # Instantiate all federation classes
     federation_classes = Federation.__subclasses__()
     federations = [cls() for cls in federation_classes]
 
     # Get data from all federations
-    data: list[ReservoirRecord] = []
-    for federation in federations:
-        try:
-            data.extend(federation.get_data(start=start))
-        except Exception as e:
-            print("Skipping federation due to error:")
-            print_exc()
-            sentry_sdk.capture_exception(e)
+    data = _fetch_federations(federations, start, since)
 
     # Parse into data frame
-    df_new = pd.DataFrame(data)
+    df_new = pd.DataFrame(data, columns=[field.name for field in fields(ReservoirRecord)])
 
     # Notify about bad data
     _notify_about_bad_data(df_new)
 
     # Cast ts_measured to datetime
     df_new["ts_measured"] = pd.to_datetime(df_new["ts_measured"], utc=True)
+    df_new = with_base_dtypes(df_new)
 
     # Add timestamp
     df_new["ts_scraped"] = dt.datetime.now(dt.UTC)
 
-    # Merge with existing data
-    df = pd.concat([df_db, df_new]) if not is_first_run else df_new
-
-    # Deduplicate, but keep new data if there are duplicates
-    df = df.drop_duplicates(
-        subset=["federation_name", "name", "ts_measured"],
-        keep="last",
+    # Stored partitions outside of the window that get new data need to be merged as well
+    touched_partitions = history.partitions_of(df_new)
+    df_outside = history.read_partitions(
+        (touched_partitions & stored_partitions) - loaded_partitions,
     )
+    if df_outside is not None:
+        df_db = pd.concat([df_outside, df_db])
+
+    # Merge with existing data. Only the overlap with the new data can contain duplicates
+    if df_db is None:
+        df = df_new
+    else:
+        is_old = df_db["ts_measured"] < df_new["ts_measured"].min()
+
+        # Deduplicate, but keep new data if there are duplicates
+        df_overlap = pd.concat([df_db[~is_old], df_new]).drop_duplicates(
+            subset=["federation_name", "name", "ts_measured"],
+            keep="last",
+        )
+        df = pd.concat([df_db[is_old], df_overlap])
 
-    # Sort
-    df = df.sort_values(["federation_name", "name", "ts_measured"])
+    # Rewrite only the partitions that got new data
+    history.write_partitions(df, touched_partitions)
 
-    # Uploads
+    # The base dataset contains the whole history, so add the remaining partitions. They
+    # rarely change, so they are read from a single assembled file
+    df_rest = history.read_assembled(stored_partitions - loaded_partitions - touched_partitions)
+    if df_rest is not None:
+        df = pd.concat([_cleanup_old_data(df_rest), df])
 
-    # Parquet
-    bio = to_parquet_bio(df, compression="gzip", index=False)
-    bio.seek(0)
-    upload_file(bio.read(), "talsperren/data.parquet.gzip")
+    # Sort
+    df = df.sort_values(["federation_name", "name", "ts_measured"])
 
     # CSV - expensive!
     # upload_dataframe(df, "talsperren/data.csv")
@@ -131,21 +235,31 @@ def _get_base_dataset():
     df["fill_percent"] = df["content_mio_m3"] / df["capacity_mio_m3"] * 100
 
     # Add metadata from federation classes
-    metas = {
-        (federation.name, reservoir_name): meta
-        for federation in federations
-        for reservoir_name, meta in federation.reservoirs.items()
-    }
-
-    for column in ReservoirMeta.__annotations__:
-        if column in df.columns:
-            continue
+    meta_columns = [column for column in ReservoirMeta.__annotations__ if column not in df.columns]
+    df_meta = pd.DataFrame(
+        [
+            {
+                "federation_name": federation.name,
+                "name": reservoir_name,
+                **{column: meta[column] for column in meta_columns},
+            }
+            for federation in federations
+            for reservoir_name, meta in federation.reservoirs.items()
+        ],
+        columns=["federation_name", "name", *meta_columns],
+    )
 
-        df[column] = df.apply(
-            lambda row: metas[(row["federation_name"], row["name"])][column],  # noqa: B023
-            axis=1,
+    with span(OP_TRANSFORM, "add_metadata", rows=len(df)):
+        df = df.merge(
+            df_meta,
+            on=["federation_name", "name"],
+            how="left",
+            validate="many_to_one",
         )
 
+    # Merging and concatenating turn the categorical columns back into plain strings
+    df = with_base_dtypes(df)
+
     # Filter bad data
     df = df.pipe(_filter_bad_data)
 
@@ -153,8 +267,67 @@ def _get_base_dataset():
     return df
 
 
+def _select_exporter_history(df: pd.DataFrame, window_start: dt.date) -> pd.DataFrame:
+    """Select the measurements the exporters need.
+
+    These are the ones since ``window_start``, but at least those within ``LATEST_HISTORY``
+    of the latest measurement of each reservoir.
+    """
+    last_measured = df.groupby(["federation_name", "name"], observed=True)["ts_measured"].transform(
+        "max"
+    )
+    since = (last_measured - LATEST_HISTORY).clip(upper=pd.Timestamp(window_start, tz="UTC"))
+    return df[df["ts_measured"] >= since].reset_index(drop=True)
+
+
+def _run_exporter(exporter: Exporter, df_base: pd.DataFrame, aggregates: AggregateCache):
+    try:
+        with span(OP_EXPORT, exporter.filename):
+            df_export = exporter.run(df_base.copy() if exporter.copy_base else df_base, aggregates)
+            upload_dataframe(
+                df_export,
+                f"talsperren/{exporter.filename}.csv",
+                datawrapper_datetimes=True,
+            )
+    except Exception as e:
+        print("Skipping exporter due to error:")
+        print_exc()
+        sentry_sdk.capture_exception(e)
+
+
+def _run_exporters(exporters: list[Exporter], df_base: pd.DataFrame, aggregates: AggregateCache):
+    """Run the exporters and the inputs they declare concurrently.
+
+    Every input is computed once, ahead of the exporters. Exporters that share an input
+    wait for it, independent ones run in parallel. Only exporters that modify ``df_base``
+    get their own copy of it.
+    """
+    specs = list(dict.fromkeys(spec for exporter in exporters for spec in exporter.inputs))
+
+    # Inputs are submitted first, so they are started before any exporter waits for them
+    with ThreadPoolExecutor(
+        max_workers=MAX_EXPORT_WORKERS, thread_name_prefix="export"
+    ) as executor:
+        for spec in specs:
+            # Copy the context so Sentry spans end up in the trace of the run
+            executor.submit(contextvars.copy_context().run, aggregates.get, spec)
+
+        for exporter in exporters:
+            executor.submit(
+                contextvars.copy_context().run,
+                _run_exporter,
+                exporter,
+                df_base,
+                aggregates,
+            )
+
+
 def run():
-    df_base = _get_base_dataset()
+    # First day of the earliest month the exporters need
+    window_start = (local_today() - relativedelta(months=HISTORY_MONTHS)).replace(day=1)
+
+    with span(OP_TRANSFORM, "base_dataset"):
+        df_base = _get_base_dataset(window_start)
 
     ## For testing
 
@@ -165,6 +338,9 @@ def run():
 
     # df_base = pd.read_parquet("local_storage/talsperren/base.parquet.gzip", engine="fastparquet")
 
+    # Only the history the exporters need
+    df_base = _select_exporter_history(df_base, window_start)
+
     # Filter out reservoirs in ignore list
     df_base = df_base[~df_base["name"].isin(IGNORE_LIST)]
 
@@ -173,18 +349,10 @@ def run():
     exporters = [cls() for cls in exporter_classes]
     exporters.extend(filtered_map_exporters())
 
-    for exporter in exporters:
-        try:
-            df_export = exporter.run(df_base.copy())
-            upload_dataframe(
-                df_export,
-                f"talsperren/{exporter.filename}.csv",
-                datawrapper_datetimes=True,
-            )
-        except Exception as e:
-            print("Skipping exporter due to error:")
-            print_exc()
-            sentry_sdk.capture_exception(e)
+    # Resampled data shared between the exporters
+    aggregates = AggregateCache(df_base)
+
+    _run_exporters(exporters, df_base, aggregates)
 
     # Run this to create tooltip markers for the locator maps
     # Will/should be created in the base maps!
@@ -194,4 +362,5 @@ def run():
     # For now, only run this on production because we have not set up
     # staging maps setup yet
     if getenv("STAGE") == "prod":
-        locator_maps.run(df_base)
+        with span(OP_EXPORT, "locator_maps"):
+            locator_maps.run(df_base)
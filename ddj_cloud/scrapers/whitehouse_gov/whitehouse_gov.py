@@ -1,15 +1,29 @@
 import datetime as dt
+import json
+import time
 from collections.abc import Generator, Iterable
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from enum import StrEnum
 
 import bs4
-import requests
 
-from ddj_cloud.utils.storage import upload_file
+from ddj_cloud.utils import http
+from ddj_cloud.utils.checkpoint import checkpoint
+from ddj_cloud.utils.fetch import fetch_all
+from ddj_cloud.utils.storage import DownloadFailedException, download_file, upload_file
+from ddj_cloud.utils.tracing import OP_FETCH, traced
 
 BASE_URL = "https://www.whitehouse.gov"
 
+# Stop fetching after this many seconds per run, including the article listings, and resume
+# on the next run, so a full pass over all articles can be spread over several invocations.
+# Well below the Lambda timeout of 15 minutes, leaving time to save the progress
+TIME_BUDGET_SECONDS = 10 * 60
+
+# Articles are fetched concurrently in chunks, the time budget is checked between chunks
+MAX_CONCURRENT_REQUESTS = 4
+FETCH_CHUNK_SIZE = MAX_CONCURRENT_REQUESTS * 2
+
 
 class ListPage(StrEnum):
     ARTICLES = "articles"
@@ -43,9 +57,29 @@ Modified at: {self.modified_at.isoformat() if self.modified_at else "N/A"}
 {self.text_clean}
         """.strip()
 
+    def to_json(self) -> dict:
+        return {
+            **asdict(self),
+            "published_at": self.published_at.isoformat(),
+            "modified_at": self.modified_at.isoformat() if self.modified_at else None,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Article":
+        return cls(
+            **{
+                **data,
+                "published_at": dt.datetime.fromisoformat(data["published_at"]),
+                "modified_at": (
+                    dt.datetime.fromisoformat(data["modified_at"]) if data["modified_at"] else None
+                ),
+            }
+        )
 
+
+@traced(OP_FETCH)
 def get_soup(url: str) -> bs4.BeautifulSoup:
-    r = requests.get(url)
+    r = http.get(url)
     r.raise_for_status()
     return bs4.BeautifulSoup(r.text, features="lxml")
 
@@ -117,13 +151,66 @@ def extract_article_data(soup: bs4.BeautifulSoup) -> Article:
     )
 
 
-def get_all_articles(page: ListPage) -> Generator[Article]:
-    for href in get_all_article_hrefs(page):
-        try:
-            soup = get_soup(href)
-            yield extract_article_data(soup)
-        except Exception:
-            print(f"Failed to scrape article at {href}")
+def _load_article_store(filename: str) -> dict[str, Article]:
+    try:
+        bio = download_file(filename)
+    except DownloadFailedException:
+        return {}
+
+    return {href: Article.from_json(data) for href, data in json.load(bio).items()}
+
+
+def _save_article_store(articles: dict[str, Article], filename: str):
+    upload_file(
+        json.dumps({href: article.to_json() for href, article in articles.items()}).encode("utf-8"),
+        filename,
+        content_type="application/json",
+        acl=None,
+        archive=False,
+    )
+
+
+def scrape_page(page: ListPage, deadline: float):
+    """Refresh all articles of a list page, resuming an unfinished pass from the checkpoint.
+
+    Every pass re-fetches each article once to pick up modifications. If the ``deadline``
+    (``time.monotonic()``) passes, the articles fetched so far are kept and the rest is
+    fetched on the next run.
+    """
+    store_filename = f"whitehouse_gov/{page.value}/articles.json"
+    hrefs = list(get_all_article_hrefs(page))
+    articles = _load_article_store(store_filename)
+
+    time_budget = max(0.0, deadline - time.monotonic())
+    with checkpoint(f"whitehouse_gov/{page.value}", time_budget=time_budget) as cp:
+        if cp.resumed:
+            print(f"Resuming {page.value} with {cp.done_count} articles already done")
+
+        pending = [href for href in hrefs if not cp.is_done(href)]
+
+        for start in range(0, len(pending), FETCH_CHUNK_SIZE):
+            if cp.expired:
+                print(f"Time budget exhausted, continuing {page.value} on next run")
+                break
+
+            chunk = pending[start : start + FETCH_CHUNK_SIZE]
+            for result in fetch_all(chunk, get_soup, max_per_host=MAX_CONCURRENT_REQUESTS):
+                try:
+                    articles[result.item] = extract_article_data(result.unwrap())
+                    cp.mark_done(result.item)
+                except Exception:
+                    # Not marked as done, so a resumed run tries again
+                    print(f"Failed to scrape article at {result.item}")
+
+        else:
+            # Pass complete, start a fresh one next time
+            cp.clear()
+
+        # Drop articles that are no longer listed
+        articles = {href: articles[href] for href in hrefs if href in articles}
+        _save_article_store(articles, store_filename)
+
+    write_articles(articles.values(), f"whitehouse_gov/{page.value}/all_articles.txt")
 
 
 def write_articles(articles: Iterable[Article], filename: str):
@@ -138,6 +225,15 @@ def write_articles(articles: Iterable[Article], filename: str):
 
 
 def run():
-    for page in ListPage:
-        articles = get_all_articles(page)
-        write_articles(articles, f"whitehouse_gov/{page.value}/all_articles.txt")
+    deadline = time.monotonic() + TIME_BUDGET_SECONDS
+    pages = list(ListPage)
+
+    for i, page in enumerate(pages):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            print(f"Time budget exhausted, skipping {page.value} until the next run")
+            continue
+
+        # Share the remaining time between the remaining pages, so a page with a long pass
+        # can't starve the others. Time a page doesn't use goes to the following ones
+        scrape_page(page, deadline=time.monotonic() + remaining / (len(pages) - i))
@@ -0,0 +1,128 @@
+"""Persist small progress markers between scraper invocations.
+
+A checkpoint is a JSON object stored through the storage module under
+``checkpoints/<name>.json``. Long-running scrapers can record which units of work are
+done, stop before they hit the Lambda timeout and resume on the next scheduled run.
+"""
+
+import json
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from typing import Any
+
+from ddj_cloud.utils.storage import (
+    DownloadFailedException,
+    delete_file,
+    download_file,
+    upload_file,
+)
+
+CHECKPOINT_PREFIX = "checkpoints"
+
+
+class Checkpoint:
+    """A small, JSON-serializable state object persisted in storage.
+
+    Use ``state`` for arbitrary (small!) data, or the ``mark_done``/``is_done`` helpers
+    to track which items of a larger batch have already been processed.
+
+    Args:
+        name (str): Name of the checkpoint, usually prefixed with the module name,
+            e.g. ``"whitehouse_gov/articles"``.
+        time_budget (float, optional): Seconds after which ``expired`` becomes True.
+            Defaults to None (never expires).
+    """
+
+    def __init__(self, name: str, *, time_budget: float | None = None):
+        self.name = name
+        self.key = f"{CHECKPOINT_PREFIX}/{name}.json"
+        self.state: dict[str, Any] = {}
+        self.resumed = False
+        self._done: set[str] = set()
+        self._cleared = False
+        self._deadline = None if time_budget is None else time.monotonic() + time_budget
+
+    def load(self) -> dict[str, Any]:
+        """Load the checkpoint from storage. Starts with an empty state if there is none.
+
+        Returns:
+            dict[str, Any]: The loaded state.
+        """
+        try:
+            bio = download_file(self.key)
+        except DownloadFailedException:
+            self.state = {}
+            self.resumed = False
+        else:
+            self.state = json.load(bio)
+            self.resumed = True
+
+        self._done = set(self.state.get("done", []))
+        self._cleared = False
+        return self.state
+
+    def save(self) -> None:
+        """Write the current state to storage. The checkpoint is private and not archived."""
+        self.state["done"] = sorted(self._done)
+        upload_file(
+            json.dumps(self.state, ensure_ascii=False).encode("utf-8"),
+            self.key,
+            content_type="application/json",
+            acl=None,
+            archive=False,
+        )
+        self._cleared = False
+
+    def clear(self) -> None:
+        """Delete the checkpoint, e.g. after all work is done. The next run starts over."""
+        delete_file(self.key)
+        self.state = {}
+        self._done = set()
+        self.resumed = False
+        self._cleared = True
+
+    def is_done(self, item: str) -> bool:
+        return item in self._done
+
+    def mark_done(self, item: str) -> None:
+        self._done.add(item)
+
+    @property
+    def done_count(self) -> int:
+        return len(self._done)
+
+    @property
+    def expired(self) -> bool:
+        """Whether the time budget is used up and the scraper should stop and save."""
+        return self._deadline is not None and time.monotonic() >= self._deadline
+
+
+@contextmanager
+def checkpoint(name: str, *, time_budget: float | None = None) -> Generator[Checkpoint]:
+    """Load a checkpoint and save it again when the block exits, even if it raised.
+
+    If ``Checkpoint.clear`` was called inside the block, nothing is saved.
+
+    Example::
+
+        with checkpoint("my_scraper/backfill", time_budget=600) as cp:
+            for item in items:
+                if cp.is_done(item):
+                    continue
+                if cp.expired:
+                    break
+                process(item)
+                cp.mark_done(item)
+
+    Args:
+        name (str): Name of the checkpoint, see ``Checkpoint``.
+        time_budget (float, optional): Seconds after which ``Checkpoint.expired`` becomes True.
+    """
+    cp = Checkpoint(name, time_budget=time_budget)
+    cp.load()
+    try:
+        yield cp
+    finally:
+        if not cp._cleared:
+            cp.save()
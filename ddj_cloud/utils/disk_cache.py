@@ -0,0 +1,138 @@
+"""Cache downloads and parsed data on the local disk, shared between runs of a warm Lambda.
+
+The cache lives in the temp directory (``/tmp`` on Lambda, the only writable place there),
+or in ``local_storage/_cache`` when using local storage. Entries are pickled, expire after
+an optional ``ttl`` and the least recently used entries are evicted once the cache grows
+beyond ``DISK_CACHE_MAX_MB`` (default 128), so it can't fill up the ephemeral storage.
+
+A cold container simply starts with an empty cache, so this only ever saves work::
+
+    stations = disk_cache.memoize("lanuk/stations", fetch_stations, ttl=3600)
+
+While recording or replaying HTTP traffic (see ``http_recording``), the cache is bypassed,
+so every request ends up in the fixtures.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+from ddj_cloud.utils import http_recording, storage
+
+if storage.USE_LOCAL_STORAGE:
+    CACHE_ROOT = storage.LOCAL_STORAGE_ROOT / "_cache"
+else:
+    CACHE_ROOT = Path(tempfile.gettempdir()) / "ddj_cloud_cache"
+
+MAX_SIZE_BYTES = int(os.environ.get("DISK_CACHE_MAX_MB", "128")) * 1024 * 1024
+
+# Evict down to this share of the maximum size, so not every write has to evict
+_EVICT_TO = 0.8
+
+# Running total of the entry sizes, so only writes beyond the maximum size have to scan the
+# cache directory. None until the first write of this process scans it.
+_size_bytes: int | None = None
+_size_lock = threading.Lock()
+
+
+def _path(key: str) -> Path:
+    return CACHE_ROOT / hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def _enabled() -> bool:
+    return not http_recording.is_active()
+
+
+def load(key: str, *, ttl: float | None = None) -> Any | None:
+    """Get the cached value for ``key``, or None if it is missing or older than ``ttl`` seconds."""
+    if not _enabled():
+        return None
+
+    path = _path(key)
+    try:
+        stat = path.stat()
+        if ttl is not None and time.time() - stat.st_mtime > ttl:
+            return None
+
+        with path.open("rb") as f:
+            value = pickle.load(f)
+
+        # The access time marks recent use for the eviction, the modification time is
+        # the age of the entry
+        os.utime(path, (time.time(), stat.st_mtime))
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+    return value
+
+
+def store(key: str, value: Any) -> None:
+    """Cache ``value`` under ``key``. Failing to write is not an error, just a cache miss."""
+    if not _enabled():
+        return
+
+    path = _path(key)
+    tmp_path = path.with_name(f"{path.name}.{uuid4().hex}.tmp")
+    try:
+        CACHE_ROOT.mkdir(parents=True, exist_ok=True)
+        with tmp_path.open("wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        size = tmp_path.stat().st_size
+        if path.exists():  # Replacing an expired entry
+            size -= path.stat().st_size
+        tmp_path.replace(path)  # Atomic, so readers never see a partial entry
+    except OSError as e:
+        print(f"Could not write disk cache entry {key}: {e}")
+        tmp_path.unlink(missing_ok=True)
+        return
+
+    _track(size)
+
+
+def memoize[T](key: str, factory: Callable[[], T], *, ttl: float | None = None) -> T:
+    """Get the cached value for ``key``, or create it with ``factory`` and cache it."""
+    value = load(key, ttl=ttl)
+    if value is None:
+        value = factory()
+        store(key, value)
+    return value
+
+
+def _track(size_delta: int) -> None:
+    global _size_bytes  # noqa: PLW0603
+
+    with _size_lock:
+        if _size_bytes is None or _size_bytes + size_delta > MAX_SIZE_BYTES:
+            # Also corrects the total for entries written by other processes
+            _size_bytes = _evict()
+        else:
+            _size_bytes += size_delta
+
+
+def _evict() -> int:
+    """Evict the least recently used entries if the cache is too large. Returns its size."""
+    entries = []
+    for path in CACHE_ROOT.iterdir():
+        try:
+            entries.append((path.stat(), path))
+        except OSError:  # Removed in the meantime
+            continue
+
+    total = sum(stat.st_size for stat, _ in entries)
+    if total <= MAX_SIZE_BYTES:
+        return total
+
+    for stat, path in sorted(entries, key=lambda entry: entry[0].st_atime):
+        path.unlink(missing_ok=True)
+        total -= stat.st_size
+        if total <= MAX_SIZE_BYTES * _EVICT_TO:
+            break
+
+    return total
@@ -0,0 +1,122 @@
+"""Fetch many independent resources concurrently, with limits per host.
+
+The fetch function is a plain blocking function (usually built on ``ddj_cloud.utils.http``)
+that runs in a thread pool, driven by asyncio. Per host, at most ``max_per_host``
+fetches run at the same time, and an optional ``RateLimit`` (token bucket, shared per
+host) keeps the request rate polite to the source.
+
+Synchronous scrapers use the blocking ``fetch_all``::
+
+    results = fetch_all(urls, fetch=get_json, max_per_host=4, rate_limit=RateLimit(2, burst=4))
+    for result in results:
+        try:
+            data = result.unwrap()
+        except Exception:
+            ...
+
+Items are URLs by default. To fetch other items, e.g. years from a single API, pass
+``host``, so all items share the limits of that host.
+"""
+
+import asyncio
+import contextvars
+from collections.abc import AsyncGenerator, Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+
+from ddj_cloud.utils.rate_limit import RateLimit, TokenBucket, bucket_for, host_of
+
+DEFAULT_MAX_PER_HOST = 4
+DEFAULT_MAX_CONCURRENCY = 16
+
+
+@dataclass
+class FetchResult[K, T]:
+    item: K
+    value: T | None = None
+    error: Exception | None = None
+
+    def unwrap(self) -> T:
+        """Return the fetched value, or raise the error if fetching failed."""
+        if self.error is not None:
+            raise self.error
+        return self.value  # type: ignore[return-value]
+
+
+class _HostLimiter:
+    def __init__(self, max_concurrent: int, bucket: TokenBucket | None):
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._bucket = bucket
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        if self._bucket is not None:
+            await self._bucket.acquire_async()
+
+    async def __aexit__(self, *exc_info):
+        self._semaphore.release()
+
+
+async def fetch_as_completed[K, T](  # noqa: PLR0913
+    items: Iterable[K],
+    fetch: Callable[[K], T],
+    *,
+    host: str | None = None,
+    max_per_host: int = DEFAULT_MAX_PER_HOST,
+    rate_limit: RateLimit | None = None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> AsyncGenerator[FetchResult[K, T]]:
+    """Fetch all items concurrently and yield the results as they complete.
+
+    Errors of individual fetches don't stop the others, they are returned in the result.
+
+    Args:
+        items (Iterable): URLs, or other items if ``host`` is given.
+        fetch (Callable): Blocking function that fetches one item.
+        host (str, optional): URL or host all items are fetched from. Defaults to the
+            host of each item.
+        max_per_host (int, optional): Maximum concurrent fetches per host. Defaults to 4.
+        rate_limit (RateLimit, optional): Request rate limit per host. The bucket is shared
+            with other users of the same host in this process. Defaults to no limit.
+        max_concurrency (int, optional): Maximum concurrent fetches overall. Defaults to 16.
+    """
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="fetch")
+    limiters: dict[str, _HostLimiter] = {}
+
+    async def run(item: K) -> FetchResult[K, T]:
+        item_host = host_of(host if host is not None else str(item))
+        if item_host not in limiters:
+            bucket = bucket_for(item_host, rate_limit) if rate_limit is not None else None
+            limiters[item_host] = _HostLimiter(max_per_host, bucket)
+
+        async with limiters[item_host]:
+            # Copy the context so Sentry spans end up in the trace of the caller
+            call = partial(contextvars.copy_context().run, fetch, item)
+            try:
+                return FetchResult(item, value=await loop.run_in_executor(executor, call))
+            except Exception as e:
+                return FetchResult(item, error=e)
+
+    tasks = [asyncio.create_task(run(item)) for item in items]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def fetch_all[K, T](
+    items: Iterable[K],
+    fetch: Callable[[K], T],
+    **kwargs,
+) -> list[FetchResult[K, T]]:
+    """Blocking version of ``fetch_as_completed``. Returns the results in completion order."""
+
+    async def collect() -> list[FetchResult[K, T]]:
+        return [result async for result in fetch_as_completed(items, fetch, **kwargs)]
+
+    return asyncio.run(collect())
@@ -0,0 +1,71 @@
+"""Skip scraper runs when the upstream data hasn't changed.
+
+A scraper module opts in by defining ``probe() -> str | None``. It should cheaply
+determine a fingerprint of the current upstream state, e.g. from the validators of a
+``HEAD`` request (see ``http_cache.fingerprint``) or the latest timestamp in a database.
+
+Before running the scraper, the handler compares the fingerprint to the one stored in
+the checkpoint ``<module_name>/probe``. If they match, the run is skipped. The new
+fingerprint is only stored after a successful run, so failed runs are retried. If the
+probe fails or returns None, the scraper always runs. Events with ``"force": true``
+run regardless.
+"""
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+from traceback import print_exc
+from types import ModuleType
+
+import sentry_sdk
+
+from ddj_cloud.utils.checkpoint import Checkpoint
+
+
+def has_probe(scraper: ModuleType) -> bool:
+    """Check whether a scraper module implements the probe contract."""
+    return callable(getattr(scraper, "probe", None))
+
+
+@dataclass
+class ProbeResult:
+    fingerprint: str | None
+    changed: bool
+    checkpoint: Checkpoint
+
+    def save(self) -> None:
+        """Store the fingerprint, call after the scraper ran successfully."""
+        if self.fingerprint is None or not self.changed:
+            return
+
+        self.checkpoint.state["fingerprint"] = self.fingerprint
+        self.checkpoint.save()
+
+
+def probe(
+    module_name: str, scraper: ModuleType, shards: Sequence[str] | None = None
+) -> ProbeResult:
+    """Run the probe of a scraper and compare the fingerprint to the stored one.
+
+    Args:
+        module_name (str): Scraper module name.
+        scraper (ModuleType): Scraper module implementing ``probe``.
+        shards (Sequence[str], optional): Shards this invocation runs. Every selection of
+            shards keeps its own fingerprint, so one shard group doesn't skip the others.
+    """
+    name = f"{module_name}/probe"
+    if shards is not None:
+        name += "/" + "+".join(shards)
+
+    checkpoint = Checkpoint(name)
+    checkpoint.load()
+
+    try:
+        fingerprint = scraper.probe()
+    except Exception as e:
+        print(f"Probe of {module_name} failed, running anyway:")
+        print_exc()
+        sentry_sdk.capture_exception(e)
+        fingerprint = None
+
+    changed = fingerprint is None or checkpoint.state.get("fingerprint") != fingerprint
+    return ProbeResult(fingerprint=fingerprint, changed=changed, checkpoint=checkpoint)
@@ -0,0 +1,84 @@
+"""Shared HTTP client for scrapers.
+
+Use ``get``/``post`` instead of bare ``requests.get`` to get:
+
+- One pooled session per host, so connections (and TLS handshakes) are reused, also
+  across invocations of a warm Lambda
+- A default timeout, so a hanging server can't block a scraper until the Lambda timeout
+- Retries with exponential backoff on connection errors, 429 and 5xx responses
+  (idempotent methods only, ``Retry-After`` is respected)
+- Compressed transfers (gzip/deflate), decoded transparently by ``requests``
+
+When retries on error statuses are used up, the last response is returned. As before, call
+``raise_for_status()`` yourself.
+"""
+
+import threading
+from typing import Any
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) in seconds
+DEFAULT_TIMEOUT = (10, 60)
+
+RETRY_TOTAL = 3
+RETRY_BACKOFF_FACTOR = 0.5  # 0.5s, 1s, 2s, ...
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Connections kept open per host, enough for concurrent fetches from one scraper
+POOL_MAXSIZE = 16
+
+_sessions: dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def _make_session() -> requests.Session:
+    retry = Retry(
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS_CODES,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    return session
+
+
+def session_for(url: str) -> requests.Session:
+    """Get the pooled session for the host of ``url``, creating it on first use."""
+    parts = urlsplit(url)
+    key = f"{parts.scheme}://{parts.netloc}"
+
+    with _sessions_lock:
+        if key not in _sessions:
+            _sessions[key] = _make_session()
+        return _sessions[key]
+
+
+def request(method: str, url: str, **kwargs: Any) -> requests.Response:
+    """Send a request through the pooled session of the host.
+
+    Accepts the same keyword arguments as ``requests.request``. ``timeout`` defaults to
+    ``DEFAULT_TIMEOUT``.
+    """
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    return session_for(url).request(method, url, **kwargs)
+
+
+def get(url: str, **kwargs: Any) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs: Any) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def head(url: str, **kwargs: Any) -> requests.Response:
+    return request("HEAD", url, **kwargs)
@@ -0,0 +1,192 @@
+"""Conditional GET requests with validators and bodies persisted in storage.
+
+For upstream files that change rarely, the ``ETag`` and ``Last-Modified`` validators of the
+last response are kept per URL under ``_http_cache/``. The next request sends them as
+``If-None-Match``/``If-Modified-Since``, and on ``304 Not Modified`` the cached body is
+returned instead of downloading it again. Warm Lambda containers also keep the bodies in
+``disk_cache``, so a 304 usually doesn't even need a storage download.
+
+``CachedResponse.changed`` tells whether the body differs from the cached one, so a scraper
+can skip processing. Sources without validators are still downloaded in full, but
+``changed`` works for them too, since it compares body hashes.
+
+Entries are never deleted, so only use this for URLs that are requested again, not for
+API calls with a date or other changing parameters in the URL. Use ``http.get`` for those.
+
+To only remember a response once it was processed successfully, pass ``save=False`` and
+call ``CachedResponse.save()`` afterwards. Otherwise a failed run would see the response
+as unchanged on the next try::
+
+    response = http_cache.get(url, save=False)
+    if response.changed:
+        process(response.text)
+        response.save()
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from io import BytesIO
+from typing import Any
+from urllib.parse import urlsplit
+
+import requests
+
+from ddj_cloud.utils import disk_cache, http
+from ddj_cloud.utils.storage import DownloadFailedException, download_file, upload_file
+from ddj_cloud.utils.tracing import OP_FETCH, traced
+
+CACHE_PREFIX = "_http_cache"
+
+
+@dataclass
+class _Entry:
+    sha256: str
+    encoding: str | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+
+    @property
+    def conditional_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    content: bytes
+    encoding: str | None
+    changed: bool
+    _entry: _Entry = field(repr=False)
+    _saved: bool = field(default=False, repr=False)
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def save(self) -> None:
+        """Remember this response for the next conditional request."""
+        if self._saved:
+            return
+
+        disk_cache.store(_body_cache_key(self._entry.sha256), self.content)
+
+        key = _cache_key(self.url)
+        upload_file(
+            BytesIO(self.content),
+            f"{key}.body",
+            ident=self._entry.sha256,
+            acl=None,
+            archive=False,
+        )
+        upload_file(
+            json.dumps(self._entry.__dict__, ensure_ascii=False).encode("utf-8"),
+            f"{key}.json",
+            content_type="application/json",
+            acl=None,
+            archive=False,
+        )
+        self._saved = True
+
+
+def _cache_key(url: str) -> str:
+    digest = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+    return f"{CACHE_PREFIX}/{urlsplit(url).hostname}/{digest}"
+
+
+def _load_entry(url: str) -> _Entry | None:
+    try:
+        return _Entry(**json.load(download_file(f"{_cache_key(url)}.json")))
+    except DownloadFailedException:
+        return None
+
+
+def _body_cache_key(sha256: str) -> str:
+    # Keyed by content, so a stale body can never be returned
+    return f"http_cache/{sha256}"
+
+
+def _load_body(url: str, entry: _Entry) -> bytes | None:
+    body = disk_cache.load(_body_cache_key(entry.sha256))
+    if body is not None:
+        return body
+
+    try:
+        body = download_file(f"{_cache_key(url)}.body").getvalue()
+    except DownloadFailedException:
+        return None
+
+    disk_cache.store(_body_cache_key(entry.sha256), body)
+    return body
+
+
+@traced(OP_FETCH)
+def get(url: str, *, save: bool = True, **kwargs: Any) -> CachedResponse:
+    """Send a conditional GET request for ``url`` through the shared HTTP client.
+
+    Raises for error statuses, like ``raise_for_status()``.
+
+    Args:
+        url (str): URL to fetch.
+        save (bool, optional): Remember the response right away. Pass False to call
+            ``CachedResponse.save()`` after processing instead. Defaults to True.
+        **kwargs: Passed on to ``http.get``, e.g. ``timeout``.
+    """
+    cached = _load_entry(url)
+    headers = {**kwargs.pop("headers", {})}
+
+    if cached is not None:
+        response = http.get(url, headers=headers | cached.conditional_headers, **kwargs)
+
+        if response.status_code == requests.codes.not_modified:
+            body = _load_body(url, cached)
+            if body is not None:
+                return CachedResponse(url, body, cached.encoding, False, cached, _saved=True)
+
+            # The body is gone, so the validators are useless
+            response = http.get(url, headers=headers, **kwargs)
+    else:
+        response = http.get(url, headers=headers, **kwargs)
+
+    response.raise_for_status()
+
+    entry = _Entry(
+        sha256=hashlib.sha256(response.content).hexdigest(),
+        encoding=response.encoding,
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+    )
+    changed = cached is None or cached.sha256 != entry.sha256
+    result = CachedResponse(url, response.content, entry.encoding, changed, entry)
+
+    if save:
+        result.save()
+    return result
+
+
+def fingerprint(url: str, **kwargs: Any) -> str | None:
+    """Fingerprint of the current version of ``url``, from the validators of a HEAD request.
+
+    Meant for scraper probes (see ``ddj_cloud.utils.freshness``). Returns None if the server
+    sends neither ``ETag`` nor ``Last-Modified``.
+
+    Args:
+        url (str): URL to check.
+        **kwargs: Passed on to ``http.head``, e.g. ``timeout``.
+    """
+    response = http.head(url, **kwargs)
+    response.raise_for_status()
+
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if etag is None and last_modified is None:
+        return None
+    return f"{etag}|{last_modified}"
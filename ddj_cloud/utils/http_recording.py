@@ -0,0 +1,148 @@
+"""Record and replay the HTTP traffic of a scraper run.
+
+While recording, every exchange that goes through ``requests`` is saved as a fixture to
+``http_fixtures/<module_name>/``. While replaying, responses are served from these
+fixtures and requests without a fixture fail with ``MissingFixtureException``, so a
+scraper runs offline and deterministically, e.g. for benchmarking.
+
+Fixtures are keyed by method, URL and request body. Only ``requests`` is covered,
+data that is fetched through other clients (e.g. ``pd.read_csv(url)``) is not recorded.
+
+Usually enabled through ``manage test <scraper> --record`` or ``--replay``.
+"""
+
+import base64
+import hashlib
+import io
+import json
+import os
+from collections.abc import Generator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from pathlib import Path
+from typing import Literal
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+FIXTURES_ROOT = Path(__file__).parent.parent.parent / "http_fixtures"
+RECORDING_ENV_VAR = "HTTP_RECORDING"
+
+# The recorded body is already decoded, so these no longer apply when replaying
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+type Mode = Literal["record", "replay"]
+
+_mode: Mode | None = None
+
+
+class MissingFixtureException(requests.ConnectionError):
+    pass
+
+
+def is_replaying() -> bool:
+    """Whether responses are currently served from fixtures, e.g. to skip rate-limit sleeps."""
+    return _mode == "replay"
+
+
+def is_active() -> bool:
+    """Whether traffic is currently recorded or replayed, e.g. to bypass local caches."""
+    return _mode is not None
+
+
+def _fixture_key(request: requests.PreparedRequest) -> str:
+    body = request.body or b""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.url}\n".encode())
+    digest.update(body)
+    return digest.hexdigest()[:32]
+
+
+def _save_fixture(path: Path, request: requests.PreparedRequest, response: requests.Response):
+    fixture = {
+        "method": request.method,
+        "url": request.url,
+        "status_code": response.status_code,
+        "reason": response.reason,
+        "final_url": response.url,
+        "encoding": response.encoding,
+        "headers": {
+            key: value
+            for key, value in response.headers.items()
+            if key.lower() not in _DROPPED_HEADERS
+        },
+        "body": base64.b64encode(response.content).decode("ascii"),
+    }
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(fixture, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def _load_fixture(path: Path, request: requests.PreparedRequest) -> requests.Response:
+    fixture = json.loads(path.read_text(encoding="utf-8"))
+
+    response = requests.Response()
+    response.status_code = fixture["status_code"]
+    response.reason = fixture["reason"]
+    response.url = fixture["final_url"]
+    response.encoding = fixture["encoding"]
+    response.headers = CaseInsensitiveDict(fixture["headers"])
+    response._content = base64.b64decode(fixture["body"])
+    response._content_consumed = True
+    response.raw = io.BytesIO(response._content)
+    response.request = request
+    return response
+
+
+@contextmanager
+def recording(module_name: str, mode: Mode) -> Generator[None]:
+    """Record or replay all ``requests`` traffic inside the block.
+
+    Args:
+        module_name (str): Scraper module name, used as fixture directory.
+        mode (str): ``"record"`` to save fixtures, ``"replay"`` to serve them.
+    """
+    global _mode  # noqa: PLW0603
+
+    fixtures_dir = FIXTURES_ROOT / module_name
+    original_send = requests.Session.send
+    count = 0
+
+    def send(session: requests.Session, request: requests.PreparedRequest, **kwargs):
+        nonlocal count
+        path = fixtures_dir / f"{_fixture_key(request)}.json"
+
+        if mode == "replay":
+            if not path.exists():
+                msg = f"No fixture for {request.method} {request.url} in {fixtures_dir}"
+                raise MissingFixtureException(msg, request=request)
+            response = _load_fixture(path, request)
+        else:
+            response = original_send(session, request, **kwargs)
+            _save_fixture(path, request, response)
+
+        count += 1
+        return response
+
+    requests.Session.send = send
+    _mode = mode
+    try:
+        yield
+    finally:
+        requests.Session.send = original_send
+        _mode = None
+        action = "Replayed" if mode == "replay" else "Recorded"
+        print(f'{action} {count} HTTP exchanges, fixtures are in "{fixtures_dir}"')
+
+
+def recording_from_env(module_name: str) -> AbstractContextManager:
+    """Record or replay if requested through the ``HTTP_RECORDING`` environment variable.
+
+    Used to pass the mode on to worker processes.
+    """
+    mode = os.environ.get(RECORDING_ENV_VAR)
+    if not mode:
+        return nullcontext()
+    return recording(module_name, mode)  # type: ignore[arg-type]
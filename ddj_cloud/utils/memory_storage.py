@@ -0,0 +1,94 @@
+"""In-memory stand-in for the S3 client used by the storage module.
+
+Enabled with the ``USE_MEMORY_STORAGE`` environment variable. Nothing touches the disk or
+the network, which keeps storage I/O out of benchmark timings. Only the client methods
+used by ``ddj_cloud.utils.storage`` are implemented.
+"""
+
+import shutil
+from io import BytesIO
+from typing import Any, BinaryIO
+
+from botocore.exceptions import ClientError
+
+
+class _Object:
+    def __init__(self, body: bytes, metadata: dict[str, str]):
+        self.body = body
+        self.metadata = metadata
+
+
+class MemoryS3Client:
+    """Keeps all objects of all buckets in a dict, keyed by ``(bucket, key)``."""
+
+    def __init__(self):
+        self.objects: dict[tuple[str, str], _Object] = {}
+
+    def snapshot(self) -> dict[str, tuple[bytes, dict[str, str]]]:
+        """Picklable copy of all objects, e.g. to seed a fresh client in another process."""
+        return {key: (obj.body, dict(obj.metadata)) for (_, key), obj in self.objects.items()}
+
+    def restore(self, bucket: str, snapshot: dict[str, tuple[bytes, dict[str, str]]]) -> None:
+        self.objects = {
+            (bucket, key): _Object(body, dict(metadata))
+            for key, (body, metadata) in snapshot.items()
+        }
+
+    def _get(self, bucket: str, key: str, operation: str) -> _Object:
+        try:
+            return self.objects[(bucket, key)]
+        except KeyError:
+            error = {
+                "Error": {"Code": "404", "Message": "Not Found"},
+                "ResponseMetadata": {"HTTPStatusCode": 404},
+            }
+            raise ClientError(error, operation) from None  # type: ignore[arg-type]
+
+    def upload_fileobj(
+        self,
+        fileobj: BinaryIO,
+        bucket: str,
+        key: str,
+        ExtraArgs: dict[str, Any] | None = None,  # noqa: N803
+    ) -> None:
+        bio = BytesIO()
+        shutil.copyfileobj(fileobj, bio)
+        metadata = (ExtraArgs or {}).get("Metadata", {})
+        self.objects[(bucket, key)] = _Object(bio.getvalue(), dict(metadata))
+
+    def download_fileobj(self, bucket: str, key: str, fileobj: BinaryIO) -> None:
+        fileobj.write(self._get(bucket, key, "GetObject").body)
+
+    def head_object(self, Bucket: str, Key: str) -> dict[str, Any]:  # noqa: N803
+        obj = self._get(Bucket, Key, "HeadObject")
+        return {"ContentLength": len(obj.body), "Metadata": dict(obj.metadata)}
+
+    def delete_object(self, Bucket: str, Key: str) -> None:  # noqa: N803
+        self.objects.pop((Bucket, Key), None)
+
+    def copy(
+        self,
+        CopySource: dict[str, str],  # noqa: N803
+        Bucket: str,  # noqa: N803
+        Key: str,  # noqa: N803
+        ExtraArgs: dict[str, Any] | None = None,  # noqa: ARG002, N803
+    ) -> None:
+        source = self._get(CopySource["Bucket"], CopySource["Key"], "CopyObject")
+        self.objects[(Bucket, Key)] = _Object(source.body, dict(source.metadata))
+
+    def get_paginator(self, operation_name: str) -> "_ListObjectsPaginator":
+        assert operation_name == "list_objects_v2"
+        return _ListObjectsPaginator(self)
+
+
+class _ListObjectsPaginator:
+    def __init__(self, client: MemoryS3Client):
+        self.client = client
+
+    def paginate(self, Bucket: str, Prefix: str = "") -> list[dict[str, Any]]:  # noqa: N803
+        contents = [
+            {"Key": key, "Size": len(obj.body)}
+            for (bucket, key), obj in sorted(self.client.objects.items())
+            if bucket == Bucket and key.startswith(Prefix)
+        ]
+        return [{"Contents": contents}]
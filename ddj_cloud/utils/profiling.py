@@ -0,0 +1,250 @@
+"""Opt-in profiling of scraper runs.
+
+Wraps a block in ``cProfile`` and ``tracemalloc`` and uploads the results through the
+storage module to ``profiles/<module_name>/<timestamp>/``:
+
+- ``run.prof``: cProfile stats, open with ``snakeviz`` or ``python -m pstats``
+- ``summary.txt``: Top functions by sampled wall time in all threads, by cumulative time
+  and top allocation sites
+- ``summary.json``: Wall time, CPU time, memory peaks and /tmp usage
+
+cProfile keeps a single call stack, so calls made concurrently in worker threads (thread
+pools, ``fetch_all``) get mixed up and their times are unreliable. The sampled wall times
+cover every thread, so use those for scrapers that do their work concurrently.
+
+Profiling is enabled for a Lambda run by setting ``"profile": true`` in the event or
+the ``PROFILE_SCRAPERS`` environment variable.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Generator
+from contextlib import contextmanager
+from pathlib import Path
+from types import CodeType
+
+import sentry_sdk
+
+from ddj_cloud.utils.date_and_time import local_now
+from ddj_cloud.utils.storage import upload_file
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+PROFILES_PREFIX = "profiles"
+PROFILE_ENV_VAR = "PROFILE_SCRAPERS"
+TOP_N = 40
+
+# Interval at which the stacks of all threads are sampled
+SAMPLE_INTERVAL_SECONDS = 0.01
+
+
+def is_requested(event: dict) -> bool:
+    """Whether profiling was requested via the event or the environment."""
+    return bool(event.get("profile") or os.environ.get(PROFILE_ENV_VAR))
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of the current process in MB, or None if unavailable."""
+    if resource is None:
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    if sys.platform == "darwin":
+        return max_rss / 1024 / 1024
+    return max_rss / 1024
+
+
+def tmp_usage_mb() -> float:
+    """Total size of the files in the temp directory (``/tmp`` on Lambda) in MB."""
+    total = 0
+    for path in Path(tempfile.gettempdir()).rglob("*"):
+        try:
+            if path.is_file() and not path.is_symlink():
+                total += path.stat().st_size
+        except OSError:  # Removed in the meantime or not accessible
+            continue
+    return total / 1024 / 1024
+
+
+class _StackSampler:
+    """Samples the stacks of all other threads at a fixed interval, for a wall-clock profile.
+
+    Counts how often each function is on a stack (``inclusive``) and on top of it
+    (``own``). Waiting counts as well, e.g. for I/O or for other threads.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.ticks = 0
+        self.inclusive: Counter[str] = Counter()
+        self.own: Counter[str] = Counter()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiling", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own_thread_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            self.ticks += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread_id:
+                    continue
+
+                self.own[_describe(frame.f_code)] += 1
+
+                # Count recursive functions once per stack
+                on_stack = set()
+                current = frame
+                while current is not None:
+                    on_stack.add(_describe(current.f_code))
+                    current = current.f_back
+                self.inclusive.update(on_stack)
+
+
+def _describe(code: CodeType) -> str:
+    return f"{code.co_filename}:{code.co_firstlineno}({code.co_qualname})"
+
+
+def _write_samples(out: io.StringIO, counts: Counter[str], ticks: int, top_n: int) -> None:
+    # Relative to the run time, so a function running in four threads at once can reach 400%
+    for function, count in counts.most_common(top_n):
+        out.write(f"{count / ticks:8.1%}  {function}\n")
+
+
+def _format_summary(  # noqa: PLR0913
+    module_name: str,
+    profiler: cProfile.Profile,
+    sampler: _StackSampler,
+    snapshot: tracemalloc.Snapshot,
+    numbers: dict,
+    top_n: int,
+) -> str:
+    out = io.StringIO()
+    out.write(f"Profile of {module_name}\n\n")
+    for key, value in numbers.items():
+        out.write(f"{key}: {value}\n")
+
+    if sampler.ticks:
+        out.write(
+            f"\n=== Top {top_n} functions by sampled wall time, all threads "
+            f"(every {sampler.interval * 1000:g} ms) ===\n\n",
+        )
+        _write_samples(out, sampler.inclusive, sampler.ticks, top_n)
+
+        out.write(f"\n=== Top {top_n} functions by sampled own wall time, all threads ===\n\n")
+        _write_samples(out, sampler.own, sampler.ticks, top_n)
+
+    out.write(
+        "\nThe cProfile times below are only reliable for code in the thread that started "
+        "the run.\nCalls in worker threads are included, but mixed up between threads.\n",
+    )
+    out.write(f"\n=== Top {top_n} functions by cumulative time ===\n\n")
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top_n)
+
+    out.write(f"\n=== Top {top_n} allocation sites (still allocated at the end) ===\n\n")
+    for stat in snapshot.statistics("lineno")[:top_n]:
+        out.write(f"{stat}\n")
+
+    return out.getvalue()
+
+
+def _upload_profile(  # noqa: PLR0913
+    module_name: str,
+    profiler: cProfile.Profile,
+    sampler: _StackSampler,
+    snapshot: tracemalloc.Snapshot,
+    numbers: dict,
+    top_n: int,
+) -> str:
+    prefix = f"{PROFILES_PREFIX}/{module_name}/{local_now().strftime('%Y-%m-%dT%H-%M-%S')}"
+
+    # pstats can only dump to a path, /tmp is writable on Lambda
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        prof_path = Path(tmp_dir) / "run.prof"
+        profiler.dump_stats(prof_path)
+        prof_bytes = prof_path.read_bytes()
+
+    uploads = [
+        ("run.prof", prof_bytes, "application/octet-stream"),
+        (
+            "summary.txt",
+            _format_summary(module_name, profiler, sampler, snapshot, numbers, top_n).encode(
+                "utf-8",
+            ),
+            "text/plain;charset=utf-8",
+        ),
+        ("summary.json", json.dumps(numbers, indent=2).encode("utf-8"), "application/json"),
+    ]
+    for name, content, content_type in uploads:
+        upload_file(
+            content,
+            f"{prefix}/{name}",
+            content_type=content_type,
+            acl=None,
+            archive=False,
+        )
+
+    return prefix
+
+
+@contextmanager
+def profile(module_name: str, *, top_n: int = TOP_N) -> Generator[None]:
+    """Profile the wrapped block and upload the results to storage.
+
+    Failing to upload the profile never fails the scraper, the error is sent to Sentry instead.
+
+    Args:
+        module_name (str): Scraper module name, used in the storage path.
+        top_n (int, optional): Number of entries in the text summary. Defaults to 40.
+    """
+    tmp_usage_start = tmp_usage_mb()
+    tracemalloc.start()
+    profiler = cProfile.Profile()
+    sampler = _StackSampler()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    sampler.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        sampler.stop()
+
+        numbers = {
+            "wall_time_s": round(time.perf_counter() - wall_start, 3),
+            "cpu_time_s": round(time.process_time() - cpu_start, 3),
+            "peak_rss_mb": peak_rss_mb(),
+            "tracemalloc_peak_mb": round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 3),
+            "tmp_usage_mb": round(max(0.0, tmp_usage_mb() - tmp_usage_start), 3),
+        }
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        try:
+            prefix = _upload_profile(module_name, profiler, sampler, snapshot, numbers, top_n)
+            print(f"Uploaded profile to {prefix}/")
+        except Exception as e:
+            print("Uploading profile failed with:")
+            print(e)
+            sentry_sdk.capture_exception(e)
@@ -0,0 +1,92 @@
+"""Per-host token-bucket rate limiting.
+
+A bucket holds up to ``burst`` tokens and is refilled with ``per_second`` tokens per second.
+Every request takes one token and waits if none is left, so short bursts go out at once
+while the average rate stays below the limit. Buckets are shared per host within the
+process and are safe to use from threads and asyncio tasks::
+
+    LIMIT = RateLimit(per_second=2, burst=4)
+
+    bucket_for(url, LIMIT).acquire()
+    response = http.get(url)
+
+Usually used through ``fetch_all(..., rate_limit=LIMIT)``. While replaying recorded
+responses, nothing is rate limited.
+"""
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+from ddj_cloud.utils import http_recording
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    per_second: float
+    burst: int = 1
+
+
+class TokenBucket:
+    def __init__(self, limit: RateLimit):
+        self.limit = limit
+        self._tokens = float(limit.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return the seconds to wait before it may be used.
+
+        The token count may go negative, which queues up the waiting callers in order.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.limit.burst,
+                self._tokens + (now - self._updated) * self.limit.per_second,
+            )
+            self._updated = now
+            self._tokens -= 1
+
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.limit.per_second
+
+    def acquire(self) -> None:
+        """Block until a request may be sent."""
+        if http_recording.is_replaying():
+            return
+
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """Wait until a request may be sent, without blocking the event loop."""
+        if http_recording.is_replaying():
+            return
+
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+_buckets: dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def host_of(url: str) -> str:
+    """Host of ``url``, or ``url`` itself if it is a plain host name."""
+    return urlsplit(url).netloc or url
+
+
+def bucket_for(url: str, limit: RateLimit) -> TokenBucket:
+    """Get the shared bucket for the host of ``url``, creating it with ``limit`` on first use."""
+    host = host_of(url)
+
+    with _buckets_lock:
+        if host not in _buckets:
+            _buckets[host] = TokenBucket(limit)
+        return _buckets[host]
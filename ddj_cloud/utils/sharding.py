@@ -0,0 +1,148 @@
+"""Run scrapers with naturally partitioned work as independent shards.
+
+A scraper module opts in by defining three functions:
+
+- ``shards() -> list[str]``: Names of all shards, in a stable order.
+- ``run_shard(shard: str) -> Any``: Do the work for one shard and return a picklable result.
+- ``merge(results: dict[str, Any]) -> None``: Combine the results of all shards and upload.
+
+Shard results are stored under ``shards/<module_name>/<shard>.pickle``, so shards can
+run in separate invocations. After running its own shards, every invocation merges
+the latest stored result of every shard. A scraper may define ``SHARD_RESULT_MAX_AGE``
+(a ``datetime.timedelta``) to ignore results from shards that haven't succeeded in a while.
+"""
+
+import datetime as dt
+import pickle
+from collections.abc import Sequence
+from traceback import print_exc
+from types import ModuleType
+from typing import Any
+
+import sentry_sdk
+
+from ddj_cloud.utils.storage import DownloadFailedException, download_file, upload_file
+
+SHARD_RESULTS_PREFIX = "shards"
+
+
+def is_sharded(scraper: ModuleType) -> bool:
+    """Check whether a scraper module implements the shard contract."""
+    return all(callable(getattr(scraper, name, None)) for name in ("shards", "run_shard", "merge"))
+
+
+def select_shards(shards: Sequence[str], index: int, count: int) -> list[str]:
+    """Select the shards handled by shard group ``index`` out of ``count`` groups."""
+    if not 0 <= index < count:
+        msg = f"Invalid shard index {index} for {count} shard groups"
+        raise ValueError(msg)
+
+    return list(shards[index::count])
+
+
+def shards_from_event(scraper: ModuleType, event: dict) -> list[str] | None:
+    """Determine which shards an event asks for.
+
+    Events can either list shard names explicitly (``"shards": [...]``) or select a
+    shard group (``"shard_index"`` and ``"shard_count"``). Returns None if the event
+    doesn't ask for shards at all.
+    """
+    if "shards" in event:
+        return list(event["shards"])
+
+    if "shard_index" in event:
+        return select_shards(scraper.shards(), event["shard_index"], event["shard_count"])
+
+    return None
+
+
+def _result_filename(module_name: str, shard: str) -> str:
+    return f"{SHARD_RESULTS_PREFIX}/{module_name}/{shard}.pickle"
+
+
+def save_shard_result(module_name: str, shard: str, result: Any) -> None:
+    payload = {"created": dt.datetime.now(dt.UTC), "result": result}
+    upload_file(
+        pickle.dumps(payload),
+        _result_filename(module_name, shard),
+        content_type="application/octet-stream",
+        acl=None,
+        archive=False,
+    )
+
+
+def load_shard_results(
+    module_name: str,
+    shards: Sequence[str],
+    *,
+    max_age: dt.timedelta | None = None,
+) -> dict[str, Any]:
+    """Load the latest stored result for each shard. Missing or stale results are skipped."""
+    results = {}
+    now = dt.datetime.now(dt.UTC)
+
+    for shard in shards:
+        try:
+            payload = pickle.load(download_file(_result_filename(module_name, shard)))
+        except DownloadFailedException:
+            print(f"No result stored for shard {shard}, skipping")
+            continue
+
+        if max_age is not None and now - payload["created"] > max_age:
+            print(f"Result for shard {shard} is from {payload['created']}, skipping")
+            continue
+
+        results[shard] = payload["result"]
+
+    return results
+
+
+def run_shards(module_name: str, scraper: ModuleType, shards: Sequence[str]) -> list[str]:
+    """Run the given shards and store their results. Returns the shards that succeeded.
+
+    Errors are reported to Sentry so the remaining shards can still run.
+    """
+    succeeded = []
+
+    for shard in shards:
+        print(f"Running shard {shard}")
+        try:
+            result = scraper.run_shard(shard)
+            save_shard_result(module_name, shard, result)
+            succeeded.append(shard)
+        except Exception as e:
+            print(f"Shard {shard} failed:")
+            print_exc()
+            sentry_sdk.capture_exception(e)
+
+    return succeeded
+
+
+def merge_shards(module_name: str, scraper: ModuleType) -> None:
+    """Merge the latest stored results of all shards of a scraper."""
+    results = load_shard_results(
+        module_name,
+        scraper.shards(),
+        max_age=getattr(scraper, "SHARD_RESULT_MAX_AGE", None),
+    )
+    scraper.merge(results)
+
+
+def run_sharded(
+    module_name: str,
+    scraper: ModuleType,
+    shards: Sequence[str],
+    *,
+    merge: bool = True,
+) -> bool:
+    """Run the given shards of a scraper, then merge the results of all shards.
+
+    Failed shards keep their previously stored result, see ``load_shard_results``.
+    Returns whether all of the given shards succeeded.
+    """
+    succeeded = run_shards(module_name, scraper, shards)
+
+    if merge:
+        merge_shards(module_name, scraper)
+
+    return len(succeeded) == len(shards)
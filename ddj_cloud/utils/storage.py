@@ -6,24 +6,40 @@ from collections.abc import Callable
 from io import BytesIO, UnsupportedOperation
 from os.path import commonprefix as common_prefix
 from pathlib import Path
-from typing import Any, BinaryIO, overload
+from typing import TYPE_CHECKING, Any, BinaryIO, overload
 from uuid import uuid4
 
-import pandas as pd
 import sentry_sdk
 from boto3 import client
 from botocore.exceptions import ClientError
 from pydantic import BaseModel, ConfigDict, ValidationError
 
 from ddj_cloud.utils.date_and_time import local_today
+from ddj_cloud.utils.tracing import OP_STORAGE_DOWNLOAD, OP_STORAGE_UPLOAD, span
+
+# pandas is imported lazily, so scrapers without pandas can be deployed with a slimmer layer
+if TYPE_CHECKING:
+    import pandas as pd
 
 USE_LOCAL_STORAGE = os.environ.get("USE_LOCAL_STORAGE", None)
+USE_MEMORY_STORAGE = os.environ.get("USE_MEMORY_STORAGE", None)
 STORAGE_EVENTS = []
 
 CLOUDFRONT_INVALIDATIONS_TO_CREATE = []
 
 if USE_LOCAL_STORAGE:
-    LOCAL_STORAGE_ROOT = Path(__file__).parent.parent.parent / "local_storage"
+    # Can be overridden to give parallel test runs their own storage
+    LOCAL_STORAGE_ROOT = Path(
+        os.environ.get("LOCAL_STORAGE_ROOT", Path(__file__).parent.parent.parent / "local_storage")
+    )
+elif USE_MEMORY_STORAGE:
+    # Used for benchmarks, see ddj_cloud/utils/memory_storage.py
+    from ddj_cloud.utils.memory_storage import MemoryS3Client
+
+    BUCKET_NAME = "memory"
+    s3 = MemoryS3Client()
+    CLOUDFRONT_ID = None
+    cloudfront = None
 else:
     try:
         BUCKET_NAME = os.environ["BUCKET_NAME"]
@@ -107,6 +123,8 @@ def make_df_compare_fn(
     """
 
     def is_equal(old, new):
+        import pandas as pd  # noqa: PLC0415
+
         old = pd.read_csv(BytesIO(old), dtype="str")
         new = pd.read_csv(BytesIO(new), dtype="str")
 
@@ -193,11 +211,12 @@ def download_file(filename: str, fileobj: BinaryIO | None = None) -> BytesIO | N
         file contents (seek position 0). When ``fileobj`` is provided, returns ``None``.
     """
     try:
-        if fileobj is not None:
-            _download_into(filename, fileobj)
-            result = None
-        else:
-            result = _download_file(filename)
+        with span(OP_STORAGE_DOWNLOAD, filename):
+            if fileobj is not None:
+                _download_into(filename, fileobj)
+                result = None
+            else:
+                result = _download_file(filename)
     except DownloadFailedException:
         STORAGE_EVENTS.append({"type": "download", "filename": filename, "success": False})
         raise
@@ -596,6 +615,36 @@ def upload_file(  # noqa: PLR0913
     """
     # Parameter validation
     filename = _normalize_storage_key(filename)
+
+    with span(OP_STORAGE_UPLOAD, filename):
+        _upload_file_checked(
+            content,
+            filename,
+            content_type=content_type,
+            change_notification=change_notification,
+            compare_fn=compare_fn,
+            ident=ident,
+            acl=acl,
+            create_cloudfront_invalidation=create_cloudfront_invalidation,
+            archive=archive,
+            rewind=rewind,
+        )
+
+
+def _upload_file_checked(  # noqa: PLR0913
+    content: bytes | BinaryIO,
+    filename: str,
+    *,
+    content_type: str | None,
+    change_notification: str | None,
+    compare_fn: Callable[[bytes, bytes], bool],
+    ident: str | None,
+    acl: str | None,
+    create_cloudfront_invalidation: bool,
+    archive: bool,
+    rewind: bool,
+):
+    """Internal implementation of ``upload_file`` after parameter validation"""
     is_bytes = isinstance(content, (bytes, bytearray))
 
     # Skip-if-unchanged check
@@ -634,7 +683,7 @@ def upload_file(  # noqa: PLR0913
 
 
 def upload_dataframe(  # noqa: PLR0913
-    df: pd.DataFrame,
+    df: "pd.DataFrame",
     filename: str,
     *,
     change_notification: str | None = None,
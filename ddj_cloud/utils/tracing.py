@@ -0,0 +1,61 @@
+"""Helpers to break scraper runs down into Sentry performance spans.
+
+Spans are only recorded when the run is sampled (see ``traces_sample_rate`` in
+``scrapers_config.json``), otherwise these helpers cost next to nothing.
+
+Use the ``OP_*`` constants so traces of all scrapers can be compared by operation.
+"""
+
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any
+
+import sentry_sdk
+from sentry_sdk.tracing import Span
+
+# Used for scrapers without "traces_sample_rate" in scrapers_config.json
+DEFAULT_TRACES_SAMPLE_RATE = 0.1
+
+OP_FETCH = "http.client"
+OP_TRANSFORM = "transform"
+OP_EXPORT = "export"
+OP_TASK = "task"
+OP_STORAGE_DOWNLOAD = "storage.download"
+OP_STORAGE_UPLOAD = "storage.upload"
+
+
+@contextmanager
+def span(op: str, name: str, **data: Any) -> Generator[Span]:
+    """Record the wrapped block as a span of the current trace.
+
+    Args:
+        op (str): Operation, preferably one of the ``OP_*`` constants.
+        name (str): What is being done, e.g. the URL or filename.
+        **data: Additional data to attach to the span.
+    """
+    with sentry_sdk.start_span(op=op, name=name) as current_span:
+        for key, value in data.items():
+            current_span.set_data(key, value)
+        yield current_span
+
+
+def traced[**P, R](op: str, name: str | None = None) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Decorator that records every call of the function as a span.
+
+    Args:
+        op (str): Operation, preferably one of the ``OP_*`` constants.
+        name (str, optional): Span name. Defaults to the function's qualified name.
+    """
+
+    def decorator(func: Callable[P, R]) -> Callable[P, R]:
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            with span(op, span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
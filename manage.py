@@ -1,14 +1,24 @@
+import datetime as dt
 import importlib
 import json
+import math
+import multiprocessing
 import os
 import shutil
+import statistics
+import subprocess
 import sys
+import time
 import traceback
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext, redirect_stderr, redirect_stdout
 from pathlib import Path
 
 import click
 import yaml
 from copier import DEFAULT_DATA, Worker
+from ddj_cloud.utils.tracing import DEFAULT_TRACES_SAMPLE_RATE
 
 BASE_DIR = Path(__file__).parent
 TEMPLATE_NAME = "scraper_template"
@@ -18,6 +28,26 @@ SCRAPERS_CONFIG_NAME = "scrapers_config.json"
 SCRAPERS_CONFIG_PATH = BASE_DIR / SCRAPERS_CONFIG_NAME
 LOCAL_STORAGE_NAME = "local_storage"
 LOCAL_STORAGE_PATH = BASE_DIR / LOCAL_STORAGE_NAME
+TEST_ALL_STORAGE_PATH = LOCAL_STORAGE_PATH / "_test_all"
+BENCH_RESULTS_PATH = BASE_DIR / "bench_results"
+PROFILES_PATH = LOCAL_STORAGE_PATH / "profiles"
+
+# Measured peaks are multiplied by this to leave room for bigger inputs
+RIGHT_SIZE_HEADROOM = 1.5
+LAMBDA_MEMORY_RANGE_MB = (128, 10240)
+LAMBDA_EPHEMERAL_STORAGE_RANGE_MB = (512, 10240)
+
+# Scrapers choose a layer with "dependency_group" in the config. "full" is the layer
+# with all requirements, built by serverless-python-requirements. The slimmer layers
+# are built with "manage build-layers". Note that the code in ddj_cloud.utils needs
+# at least the "core" packages.
+LAYERS_PATH = BASE_DIR / ".layers"
+DEFAULT_DEPENDENCY_GROUP = "full"
+_CORE_PACKAGES = ["requests", "sentry-sdk", "pydantic", "certifi", "tzdata"]
+LAYER_GROUPS = {
+    "core": [*_CORE_PACKAGES, "beautifulsoup4", "lxml"],
+    "pandas": [*_CORE_PACKAGES, "pandas", "numpy", "fastparquet"],
+}
 
 
 def _success(
@@ -186,6 +216,8 @@ def new_scraper(pretend: bool):
     }
 
     new_entry["events"] = [event]
+    new_entry["traces_sample_rate"] = DEFAULT_TRACES_SAMPLE_RATE
+    new_entry["dependency_group"] = DEFAULT_DEPENDENCY_GROUP
     new_entry["extra_env"] = []
     new_entry["deploy"] = True
 
@@ -250,12 +282,65 @@ def _load_local_test_env():
         load_dotenv(env_file)
 
 
-def _run_scraper_test(module_name: str):
+def _run_shard_group(module_name: str, shard_index: int, shard_count: int) -> list[str]:
+    """Run one group of shards in a worker process. Returns the storage event descriptions."""
+    os.environ["USE_LOCAL_STORAGE"] = "1"
+
+    scraper = importlib.import_module(f"ddj_cloud.scrapers.{module_name}.{module_name}")
+    sharding = importlib.import_module("ddj_cloud.utils.sharding")
+    storage = importlib.import_module("ddj_cloud.utils.storage")
+    http_recording = importlib.import_module("ddj_cloud.utils.http_recording")
+
+    shards = sharding.select_shards(scraper.shards(), shard_index, shard_count)
+    with http_recording.recording_from_env(module_name):
+        sharding.run_shards(module_name, scraper, shards)
+
+    return storage.describe_events()
+
+
+def _run_sharded(module_name: str, scraper, shard_count: int):
+    sharding = importlib.import_module("ddj_cloud.utils.sharding")
+
+    if not sharding.is_sharded(scraper):
+        _error("Error: Scraper does not define shards(), run_shard() and merge()")
+        sys.exit(1)
+
+    _info(f"Running shards {scraper.shards()} in {shard_count} processes\n")
+
+    with ProcessPoolExecutor(
+        max_workers=shard_count,
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as pool:
+        futures = [
+            pool.submit(_run_shard_group, module_name, shard_index, shard_count)
+            for shard_index in range(shard_count)
+        ]
+        event_descriptions = [description for f in futures for description in f.result()]
+
+    _info("\nMerging shard results\n")
+    sharding.merge_shards(module_name, scraper)
+
+    _info("\nThe shard processes performed the following storage operations:")
+    for event_description in event_descriptions:
+        _info(f"- {event_description}")
+
+
+def _run_scraper_test(
+    module_name: str,
+    *,
+    shard_count: int | None = None,
+    profile: bool = False,
+    http_mode: str | None = None,
+):
     _info(f'Loading scraper module "{module_name}"...')
 
     # Disable S3/CloudFront for local testing
     os.environ["USE_LOCAL_STORAGE"] = "1"
 
+    # Passed on through the environment so shard worker processes pick it up as well
+    if http_mode is not None:
+        os.environ["HTTP_RECORDING"] = http_mode
+
     if not (SCRAPERS_DIR / module_name).exists():
         _error(f'Error: Scraper "{module_name}" not found in "{SCRAPERS_DIR}".')
         sys.exit(1)
@@ -268,12 +353,19 @@ def _run_scraper_test(module_name: str):
 
     _success("Scraper loaded successfully!")
 
+    profiling = importlib.import_module("ddj_cloud.utils.profiling")
+    run_context = profiling.profile(module_name) if profile else nullcontext()
+    http_recording = importlib.import_module("ddj_cloud.utils.http_recording")
+
     try:
-        if getattr(scraper, "run", None):
-            _info("Running scraper now!\n")
-            scraper.run()
-        else:
-            _warn("Warning: Scraper has no run() method")
+        with http_recording.recording_from_env(module_name), run_context:
+            if shard_count is not None:
+                _run_sharded(module_name, scraper, shard_count)
+            elif getattr(scraper, "run", None):
+                _info("Running scraper now!\n")
+                scraper.run()
+            else:
+                _warn("Warning: Scraper has no run() method")
 
     except Exception:
         _error("Scraper failed! Logging error...\n")
@@ -291,14 +383,122 @@ def _run_scraper_test(module_name: str):
 
     _info("\nTip: During local testing, no files are actually uploaded to AWS.")
     _info("Instead, files are saved locally to the following directory:")
-    _info(str(LOCAL_STORAGE_PATH))
+    _info(str(storage.LOCAL_STORAGE_ROOT))
+
+
+def _run_test_isolated(module_name: str) -> dict:
+    """Test a scraper in a worker process with its own storage root and log file.
+
+    Returns a summary of the run, the output goes to ``test.log`` in the storage root.
+    """
+    storage_root = TEST_ALL_STORAGE_PATH / module_name
+    storage_root.mkdir(parents=True, exist_ok=True)
+    os.environ["LOCAL_STORAGE_ROOT"] = str(storage_root)
+
+    log_path = storage_root / "test.log"
+    error = None
+    start = time.perf_counter()
+
+    with (
+        open(log_path, "w", encoding="utf-8") as log,
+        redirect_stdout(log),
+        redirect_stderr(log),
+    ):
+        try:
+            _run_scraper_test(module_name)
+        except BaseException as e:  # Also catch sys.exit() from _run_scraper_test
+            traceback.print_exc()
+            error = f"{type(e).__name__}: {e}"
+
+    profiling = importlib.import_module("ddj_cloud.utils.profiling")
+
+    return {
+        "module_name": module_name,
+        "error": error,
+        "wall_time_s": time.perf_counter() - start,
+        "peak_rss_mb": profiling.peak_rss_mb(),
+        "log_path": log_path,
+    }
+
+
+def _run_tests_isolated(module_names: list[str], jobs: int):
+    _info(f"Testing {len(module_names)} scrapers in {jobs} processes...\n")
+
+    # A fresh process per scraper, so module state and peak RSS aren't shared
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        mp_context=multiprocessing.get_context("spawn"),
+        max_tasks_per_child=1,
+    ) as pool:
+        futures = [pool.submit(_run_test_isolated, module_name) for module_name in module_names]
+
+        results = []
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result["error"] is None:
+                _success(f"{result['module_name']} succeeded")
+            else:
+                _error(f'{result["module_name"]} failed, see "{result["log_path"]}"')
+
+    results.sort(key=lambda result: module_names.index(result["module_name"]))
+    name_width = max(len("Scraper"), *(len(name) for name in module_names))
+
+    _info(f"\n{'Scraper':<{name_width}}  {'Result':<6}  {'Wall time':>9}  {'Peak RSS':>10}")
+    for result in results:
+        peak_rss = result["peak_rss_mb"]
+        line = (
+            f"{result['module_name']:<{name_width}}  "
+            f"{'ok' if result['error'] is None else 'FAILED':<6}  "
+            f"{result['wall_time_s']:>8.1f}s  "
+            f"{'n/a' if peak_rss is None else f'{peak_rss:.0f} MB':>10}"
+        )
+        if result["error"] is None:
+            _info(line)
+        else:
+            _error(line)
+
+    _info(f'\nOutput and files of each scraper are in "{TEST_ALL_STORAGE_PATH}"')
+
+    if any(result["error"] is not None for result in results):
+        sys.exit(1)
 
 
 @cli.command("test", help="Test a scraper locally.")
 @click.argument("module_name", type=str)
-def test_scraper(module_name):
+@click.option(
+    "--shards",
+    "shard_count",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Split the scraper's shards into N groups, run them in parallel processes and merge the results.",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    help='Profile the run with cProfile and tracemalloc and save the results to "profiles/" in local storage.',
+)
+@click.option(
+    "--record",
+    "http_mode",
+    flag_value="record",
+    default=None,
+    help='Save all HTTP responses as fixtures to "http_fixtures/<module_name>/".',
+)
+@click.option(
+    "--replay",
+    "http_mode",
+    flag_value="replay",
+    help="Serve HTTP responses from the recorded fixtures instead of the network.",
+)
+def test_scraper(module_name, shard_count: int | None, profile: bool, http_mode: str | None):
     _load_local_test_env()
-    _run_scraper_test(module_name)
+    _run_scraper_test(
+        module_name,
+        shard_count=shard_count,
+        profile=profile,
+        http_mode=http_mode,
+    )
 
 
 @cli.command("test-all", help="Test all scrapers locally.")
@@ -307,22 +507,350 @@ def test_scraper(module_name):
     is_flag=True,
     help="Also test scrapers that are not deployed.",
 )
-def test_all_scrapers(include_not_deployed: bool):
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=None,
+    help=f'Run the scrapers in N parallel processes, each with its own storage in "{LOCAL_STORAGE_NAME}/_test_all/".',
+)
+def test_all_scrapers(include_not_deployed: bool, jobs: int | None):
     _load_local_test_env()
     scrapers_config = _load_scrapers_config()
 
-    for scraper in scrapers_config:
-        if not scraper["deploy"] and not include_not_deployed:
-            continue
+    module_names = [
+        scraper["module_name"]
+        for scraper in scrapers_config
+        if scraper["deploy"] or include_not_deployed
+    ]
+
+    if jobs is not None:
+        _run_tests_isolated(module_names, jobs)
+        return
 
+    for module_name in module_names:
         try:
-            _run_scraper_test(scraper["module_name"])
+            _run_scraper_test(module_name)
         except Exception:
             click.echo(traceback.format_exc())
 
 
+def _run_bench_iteration(
+    module_name: str,
+    entrypoint: str,
+    storage_snapshot: dict | None,
+    *,
+    trace_allocations: bool = False,
+) -> dict:
+    """Run a scraper once in a worker process against in-memory storage and replayed HTTP.
+
+    Returns the measurements and the storage contents afterwards.
+    """
+    os.environ["USE_MEMORY_STORAGE"] = "1"
+    os.environ.pop("USE_LOCAL_STORAGE", None)
+
+    storage = importlib.import_module("ddj_cloud.utils.storage")
+    http_recording = importlib.import_module("ddj_cloud.utils.http_recording")
+    profiling = importlib.import_module("ddj_cloud.utils.profiling")
+
+    tmp_usage_start = profiling.tmp_usage_mb()
+
+    if storage_snapshot is not None:
+        storage.s3.restore(storage.BUCKET_NAME, storage_snapshot)
+
+    scraper = importlib.import_module(f"ddj_cloud.scrapers.{module_name}.{module_name}")
+    func = getattr(scraper, entrypoint)
+
+    if trace_allocations:
+        tracemalloc.start()
+
+    error = None
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    # Scraper output would drown the results
+    with (
+        open(os.devnull, "w") as devnull,
+        redirect_stdout(devnull),
+        http_recording.recording(module_name, "replay"),
+    ):
+        try:
+            func()
+        except Exception:
+            error = traceback.format_exc()
+
+    result = {
+        "error": error,
+        "wall_time_s": time.perf_counter() - wall_start,
+        "cpu_time_s": time.process_time() - cpu_start,
+        "peak_rss_mb": profiling.peak_rss_mb(),
+        "tmp_usage_mb": max(0.0, profiling.tmp_usage_mb() - tmp_usage_start),
+        "storage_snapshot": storage.s3.snapshot(),
+    }
+
+    if trace_allocations:
+        snapshot = tracemalloc.take_snapshot()
+        result["tracemalloc_peak_mb"] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        result["allocated_blocks"] = sum(stat.count for stat in snapshot.statistics("filename"))
+        tracemalloc.stop()
+
+    return result
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    """Nearest-rank percentile, good enough for a handful of samples."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _summarize(values: list[float]) -> dict[str, float]:
+    return {
+        "min": min(values),
+        "median": statistics.median(values),
+        "p95": _percentile(values, 95),
+        "max": max(values),
+    }
+
+
+def _git_revision() -> dict[str, str | None]:
+    def _git(*args: str) -> str | None:
+        try:
+            return subprocess.run(
+                ["git", *args],
+                cwd=BASE_DIR,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "branch": _git("rev-parse", "--abbrev-ref", "HEAD"),
+        "commit": _git("rev-parse", "HEAD"),
+    }
+
+
+@cli.command("bench", help="Benchmark a scraper against recorded HTTP fixtures.")
+@click.argument("module_name", type=str)
+@click.option(
+    "-n",
+    "iterations",
+    type=click.IntRange(min=1),
+    default=5,
+    show_default=True,
+    help="Number of measured runs.",
+)
+@click.option(
+    "--warmup",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    help="Number of unmeasured runs first. Their storage contents are the starting point of every measured run.",
+)
+@click.option(
+    "--entrypoint",
+    default="run",
+    show_default=True,
+    help="Function of the scraper module to benchmark. It is called without arguments.",
+)
+def bench_scraper(module_name: str, iterations: int, warmup: int, entrypoint: str):
+    _load_local_test_env()
+
+    fixtures_dir = BASE_DIR / "http_fixtures" / module_name
+    if not fixtures_dir.exists():
+        _error(f'Error: No HTTP fixtures in "{fixtures_dir}".')
+        _info(f'Record them first with "uv run manage test {module_name} --record".')
+        sys.exit(1)
+
+    # Every run gets a fresh process, so module state and peak RSS don't carry over
+    def run_iteration(storage_snapshot: dict | None, *, trace_allocations: bool = False) -> dict:
+        with ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            result = pool.submit(
+                _run_bench_iteration,
+                module_name,
+                entrypoint,
+                storage_snapshot,
+                trace_allocations=trace_allocations,
+            ).result()
+
+        if result["error"] is not None:
+            _error(f"{module_name}.{entrypoint}() failed:\n")
+            click.echo(result["error"])
+            sys.exit(1)
+
+        return result
+
+    storage_snapshot = None
+    for i in range(warmup):
+        _info(f"Warm-up run {i + 1}/{warmup}...")
+        storage_snapshot = run_iteration(storage_snapshot)["storage_snapshot"]
+
+    runs = []
+    for i in range(iterations):
+        _info(f"Measured run {i + 1}/{iterations}...")
+        runs.append(run_iteration(storage_snapshot))
+
+    # tracemalloc slows things down a lot, so allocations are measured in a separate run
+    _info("Allocation run...")
+    allocation_run = run_iteration(storage_snapshot, trace_allocations=True)
+
+    peak_rss = [run["peak_rss_mb"] for run in runs if run["peak_rss_mb"] is not None]
+    results = {
+        "module_name": module_name,
+        "entrypoint": entrypoint,
+        "created": dt.datetime.now().isoformat(timespec="seconds"),
+        **_git_revision(),
+        "python": sys.version.split()[0],
+        "iterations": iterations,
+        "warmup": warmup,
+        "wall_time_s": _summarize([run["wall_time_s"] for run in runs]),
+        "cpu_time_s": _summarize([run["cpu_time_s"] for run in runs]),
+        "peak_rss_mb": _summarize(peak_rss) if peak_rss else None,
+        "tmp_usage_mb": _summarize([run["tmp_usage_mb"] for run in runs]),
+        "tracemalloc_peak_mb": allocation_run["tracemalloc_peak_mb"],
+        "allocated_blocks": allocation_run["allocated_blocks"],
+        "runs": [
+            {key: run[key] for key in ("wall_time_s", "cpu_time_s", "peak_rss_mb", "tmp_usage_mb")}
+            for run in runs
+        ],
+    }
+
+    _info(f"\n{'':<12}  {'min':>9}  {'median':>9}  {'p95':>9}")
+    for key, unit in [
+        ("wall_time_s", "s"),
+        ("cpu_time_s", "s"),
+        ("peak_rss_mb", " MB"),
+        ("tmp_usage_mb", " MB"),
+    ]:
+        if results[key] is None:
+            continue
+        values = "  ".join(
+            f"{results[key][stat]:>{9 - len(unit)}.2f}{unit}" for stat in ("min", "median", "p95")
+        )
+        _info(f"{key:<12}  {values}")
+
+    _info(f"\ntracemalloc peak: {results['tracemalloc_peak_mb']:.1f} MB")
+    _info(f"Allocated blocks at the end: {results['allocated_blocks']}")
+
+    results_path = (
+        BENCH_RESULTS_PATH / module_name / f"{dt.datetime.now().strftime('%Y-%m-%dT%H-%M-%S')}.json"
+    )
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    results_path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    _success(f'\nSaved results to "{results_path.relative_to(BASE_DIR)}"')
+
+
+def _latest_json(paths: list[Path]) -> dict | None:
+    # Timestamps in the filenames/directories sort chronologically
+    for path in sorted(paths, reverse=True):
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            continue
+    return None
+
+
+def _measured_usage(module_name: str) -> dict | None:
+    """Peak RSS and /tmp usage from the latest benchmark and profile of a scraper, whichever is higher."""
+    measurements = []
+
+    bench = _latest_json(list((BENCH_RESULTS_PATH / module_name).glob("*.json")))
+    if bench is not None and bench.get("peak_rss_mb"):
+        measurements.append(
+            {
+                "peak_rss_mb": bench["peak_rss_mb"]["max"],
+                "tmp_usage_mb": (bench.get("tmp_usage_mb") or {}).get("max", 0.0),
+            }
+        )
+
+    profile = _latest_json(list((PROFILES_PATH / module_name).glob("*/summary.json")))
+    if profile is not None and profile.get("peak_rss_mb"):
+        measurements.append(
+            {
+                "peak_rss_mb": profile["peak_rss_mb"],
+                "tmp_usage_mb": profile.get("tmp_usage_mb", 0.0),
+            }
+        )
+
+    if not measurements:
+        return None
+
+    return {
+        "peak_rss_mb": max(m["peak_rss_mb"] for m in measurements),
+        "tmp_usage_mb": max(m["tmp_usage_mb"] for m in measurements),
+    }
+
+
+def _round_up(value: float, step: int, minimum: int, maximum: int) -> int:
+    return min(maximum, max(minimum, math.ceil(value / step) * step))
+
+
+def _right_size(scrapers_config: list[dict], *, apply: bool):
+    """Suggest memory and ephemeral storage sizes from measurements and optionally apply them."""
+    _info(f"\n{'Scraper':<32}  {'Memory (peak -> new)':<26}  Ephemeral storage (/tmp -> new)")
+
+    changed = False
+    for scraper in scrapers_config:
+        if not scraper["deploy"]:
+            continue
+
+        module_name = scraper["module_name"]
+        usage = _measured_usage(module_name)
+        if usage is None:
+            _warn(f"{module_name:<32}  no measurements, run manage bench or manage test --profile")
+            continue
+
+        memory_size = _round_up(
+            usage["peak_rss_mb"] * RIGHT_SIZE_HEADROOM, 128, *LAMBDA_MEMORY_RANGE_MB
+        )
+        ephemeral_storage = _round_up(
+            usage["tmp_usage_mb"] * RIGHT_SIZE_HEADROOM, 512, *LAMBDA_EPHEMERAL_STORAGE_RANGE_MB
+        )
+
+        memory = f"{scraper['memory_size']} ({usage['peak_rss_mb']:.0f}) -> {memory_size}"
+        storage = (
+            f"{scraper['ephemeral_storage']} ({usage['tmp_usage_mb']:.0f}) -> {ephemeral_storage}"
+        )
+        line = f"{module_name:<32}  {memory:<26}  {storage}"
+
+        if (str(memory_size), str(ephemeral_storage)) == (
+            scraper["memory_size"],
+            scraper["ephemeral_storage"],
+        ):
+            _info(line)
+            continue
+
+        _success(line)
+        if apply:
+            scraper["memory_size"] = str(memory_size)
+            scraper["ephemeral_storage"] = str(ephemeral_storage)
+            changed = True
+
+    if changed:
+        _save_scrapers_config(scrapers_config)
+        _success(f'\nUpdated sizes in "{SCRAPERS_CONFIG_NAME}".\n')
+    elif not apply:
+        _info('\nRun with "--right-size --apply" to write the new sizes to the config.\n')
+    else:
+        _info("")
+
+
 @cli.command("generate", help='Generate the "serverless.yml" for deployment.')
-def generate_serverless_yml():
+@click.option(
+    "--right-size",
+    is_flag=True,
+    help="Suggest memory and ephemeral storage sizes from the latest benchmark and profile results.",
+)
+@click.option(
+    "--apply",
+    is_flag=True,
+    help=f'With --right-size, write the suggested sizes to "{SCRAPERS_CONFIG_NAME}" before generating.',
+)
+def generate_serverless_yml(right_size: bool, apply: bool):
     _info(
         f'Generating "serverless.yml" from "serverless.part.yml" and "{SCRAPERS_CONFIG_NAME}"... '
     )
@@ -331,6 +859,7 @@ def generate_serverless_yml():
         serverless_part_yml = yaml.safe_load(fp)
 
     functions = serverless_part_yml.get("functions", {})
+    layers = serverless_part_yml.get("layers", {})
 
     # Allow disabling the layer, mostly for local testing
     use_layer = not os.environ.get("NO_LAMBDA_LAYER")
@@ -346,6 +875,11 @@ def generate_serverless_yml():
 
     scrapers_config = _load_scrapers_config()
 
+    if right_size:
+        _right_size(scrapers_config, apply=apply)
+    elif apply:
+        _warn("Warning: --apply has no effect without --right-size")
+
     rate_presets = {
         "15min": "rate(15 minutes)",
         "hourly": "rate(1 hour)",
@@ -362,20 +896,32 @@ def generate_serverless_yml():
             if event["type"] == "schedule":
                 name = "${self:service}-${self:provider.stage}-" + f"{scraper['module_name']}-{i}"
                 rate = event["data"]["interval_custom"] or rate_presets[event["data"]["interval"]]
-                events.append(
-                    {
-                        "schedule": {
-                            "name": name,
-                            "rate": rate.strip(),
-                            "enabled": event["enabled"],
-                            "input": {
-                                "module_name": scraper["module_name"],
-                            },
+
+                # Sharded scrapers get one schedule per shard group, see ddj_cloud.utils.sharding
+                shard_count = event["data"].get("shard_count", 1)
+
+                for shard_index in range(shard_count):
+                    schedule_input = {"module_name": scraper["module_name"]}
+
+                    if shard_count > 1:
+                        schedule_input["shard_index"] = shard_index
+                        schedule_input["shard_count"] = shard_count
+
+                    events.append(
+                        {
+                            "schedule": {
+                                "name": name if shard_count == 1 else f"{name}-{shard_index}",
+                                "rate": rate.strip(),
+                                "enabled": event["enabled"],
+                                "input": schedule_input,
+                            }
                         }
-                    }
-                )
+                    )
 
         extra_env_vars = {var: "${env:" + var + "}" for var in scraper["extra_env"]}
+        extra_env_vars["SENTRY_TRACES_SAMPLE_RATE"] = str(
+            scraper.get("traces_sample_rate", DEFAULT_TRACES_SAMPLE_RATE)
+        )
 
         function_definition = {
             "handler": "ddj_cloud.handler.scrape",
@@ -388,7 +934,7 @@ def generate_serverless_yml():
         }
 
         if use_layer:
-            function_definition["layers"] = [{"Ref": "PythonRequirementsLambdaLayer"}]
+            function_definition["layers"] = _function_layers(scraper, layers)
 
         # We use pascal case for the key, otherwise they literally put "Underscore" there
         name_pascal_case = scraper["module_name"].replace("_", " ").title().replace(" ", "")
@@ -396,11 +942,112 @@ def generate_serverless_yml():
 
     serverless_part_yml["functions"] = functions
 
+    if layers:
+        serverless_part_yml["layers"] = layers
+
     with open(BASE_DIR / "serverless.yml", "w", encoding="utf-8") as fp:
         yaml.dump(serverless_part_yml, fp)
 
     _success("Success!")
 
 
+def _dependency_group(scraper: dict) -> str:
+    group = scraper.get("dependency_group", DEFAULT_DEPENDENCY_GROUP)
+    if group != DEFAULT_DEPENDENCY_GROUP and group not in LAYER_GROUPS:
+        _error(
+            f'Error: Unknown dependency group "{group}" for scraper "{scraper["module_name"]}". '
+            f"Choose one of: {', '.join([DEFAULT_DEPENDENCY_GROUP, *LAYER_GROUPS])}"
+        )
+        sys.exit(1)
+    return group
+
+
+def _layer_ref(group: str) -> dict:
+    if group == DEFAULT_DEPENDENCY_GROUP:
+        return {"Ref": "PythonRequirementsLambdaLayer"}
+    return {"Ref": f"Requirements{group.title()}LambdaLayer"}
+
+
+def _function_layers(scraper: dict, layers: dict) -> list[dict]:
+    """Layers of a scraper's function. Adds the definition of its layer to ``layers`` if needed."""
+    group = _dependency_group(scraper)
+
+    if group != DEFAULT_DEPENDENCY_GROUP:
+        layers[f"requirements{group.title()}"] = {
+            "path": (LAYERS_PATH / group).relative_to(BASE_DIR).as_posix(),
+            "name": "${self:service}-${self:provider.stage}-requirements-" + group,
+            "description": f'Python requirements lambda layer for dependency group "{group}"',
+            "compatibleRuntimes": ["python3.13"],
+            "package": {"patterns": ["**"]},
+        }
+
+    # Serverless names the layer resources after the pascal-cased layer key
+    return [_layer_ref(group)]
+
+
+@cli.command(
+    "build-layers",
+    help='Build the Lambda layers for the dependency groups of the deployed scrapers into ".layers/".',
+)
+def build_layers():
+    requirements_path = BASE_DIR / "requirements.txt"
+    if not requirements_path.exists():
+        _error(f'Error: "{requirements_path.name}" not found. Render it first with:')
+        _info(
+            "uv export --frozen --format requirements.txt --no-dev --no-emit-project "
+            "--no-header --no-hashes --no-annotate --output-file requirements.txt"
+        )
+        sys.exit(1)
+
+    scrapers_config = _load_scrapers_config()
+    groups = sorted(
+        {_dependency_group(scraper) for scraper in scrapers_config if scraper["deploy"]}
+        - {DEFAULT_DEPENDENCY_GROUP}
+    )
+
+    for group in groups:
+        layer_path = LAYERS_PATH / group
+        target = layer_path / "python"
+        _info(f'Building layer "{group}" with {", ".join(LAYER_GROUPS[group])}...')
+
+        shutil.rmtree(layer_path, ignore_errors=True)
+
+        # Same platform options as for the serverless-python-requirements layer,
+        # pinned to the same versions through requirements.txt
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "pip",
+                "install",
+                "--quiet",
+                "--target",
+                str(target),
+                "--constraint",
+                str(requirements_path),
+                "--platform",
+                "manylinux_2_28_x86_64",
+                "--platform",
+                "manylinux2014_x86_64",
+                "--only-binary=:all:",
+                "--implementation",
+                "cp",
+                "--python-version",
+                "3.13",
+                *LAYER_GROUPS[group],
+            ],
+            check=True,
+        )
+
+        # Slim down like the serverless-python-requirements layer
+        for pattern in ("**/__pycache__", "**/tests"):
+            for path in list(target.glob(pattern)):
+                if path.is_dir():
+                    shutil.rmtree(path)
+
+        size = sum(path.stat().st_size for path in target.rglob("*") if path.is_file())
+        _success(f'Built layer "{group}" ({size / 1024 / 1024:.1f} MB)')
+
+
 if __name__ == "__main__":
     sys.exit(cli())